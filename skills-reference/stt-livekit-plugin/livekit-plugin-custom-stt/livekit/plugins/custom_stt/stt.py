@@ -10,12 +10,23 @@ from typing import Optional, Literal
 from urllib.parse import urljoin
 
 import aiohttp
-import websockets
 from livekit import agents, rtc
 from livekit.agents import stt as stt_agents, utils
 
 logger = logging.getLogger(__name__)
 
+# orjson parses several times faster than the standard library on the
+# per-message receive path; fall back to json when it is not installed
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Audio duration (seconds) coalesced into each WebSocket send
+_SEND_CHUNK_DURATION = 0.1
+
 
 @dataclass
 class STTOptions:
@@ -36,6 +47,9 @@ class STTOptions:
     sample_rate: int = 16000
     """Audio sample rate in Hz."""
 
+    interim_results: bool = False
+    """Request quick partial transcripts ahead of the final ones (extra server compute)."""
+
 
 class STT(stt_agents.STT):
     """
@@ -60,18 +74,33 @@ class STT(stt_agents.STT):
             options: Configuration options for transcription
             http_session: Optional aiohttp session for connection pooling
         """
+        options = options or STTOptions()
         super().__init__(
             capabilities=stt_agents.STTCapabilities(
                 streaming=True,
-                interim_results=False,  # Whisper provides final results
+                interim_results=options.interim_results,
             )
         )
 
         self._api_url = api_url.rstrip("/")
-        self._options = options or STTOptions()
+        self._options = options
         self._session = http_session
         self._own_session = http_session is None
 
+        # Query parameters for batch transcription are fixed per instance
+        # (bools as strings, which aiohttp requires), so build them once
+        self._transcribe_url = urljoin(self._api_url, "/transcribe")
+        self._transcribe_params = {
+            "language": self._options.language,
+            "task": self._options.task,
+            "beam_size": self._options.beam_size,
+            "vad_filter": str(self._options.vad_filter).lower(),
+        }
+        # Remove None values
+        self._transcribe_params = {
+            k: v for k, v in self._transcribe_params.items() if v is not None
+        }
+
     @property
     def model(self) -> str:
         """Return the model identifier."""
@@ -100,42 +129,32 @@ class STT(stt_agents.STT):
         """
         session = await self._ensure_session()
 
-        # Convert audio buffer to WAV format
-        import io
-        import wave
-
-        wav_io = io.BytesIO()
-        with wave.open(wav_io, 'wb') as wav_file:
-            wav_file.setnchannels(buffer.num_channels)
-            wav_file.setsampwidth(2)  # 16-bit audio
-            wav_file.setframerate(buffer.sample_rate)
-            wav_file.writeframes(buffer.data.tobytes())
-
-        wav_io.seek(0)
-        audio_data = wav_io.read()
-
-        # Prepare form data
+        # Upload the raw int16 PCM straight from the frame's memoryview; the
+        # format is described in query parameters, so the server needs no
+        # container parsing or decoding
         form_data = aiohttp.FormData()
         form_data.add_field(
             "file",
-            audio_data,
-            filename="audio.wav",
-            content_type="audio/wav",
+            memoryview(buffer.data).cast("B"),
+            filename="audio.pcm",
+            content_type="application/octet-stream",
         )
 
-        # Build URL with query parameters
-        url = urljoin(self._api_url, "/transcribe")
+        # Describe the PCM and apply the language override on top of the
+        # per-instance defaults
         params = {
-            "language": language or self._options.language,
-            "task": self._options.task,
-            "beam_size": self._options.beam_size,
-            "vad_filter": self._options.vad_filter,
+            **self._transcribe_params,
+            "sample_rate": buffer.sample_rate,
+            "channels": buffer.num_channels,
+            "dtype": "int16",
         }
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
+        if language:
+            params["language"] = language
 
         try:
-            async with session.post(url, data=form_data, params=params) as response:
+            async with session.post(
+                self._transcribe_url, data=form_data, params=params
+            ) as response:
                 response.raise_for_status()
                 result = await response.json()
 
@@ -191,9 +210,22 @@ class STT(stt_agents.STT):
         )
 
     async def _ensure_session(self) -> aiohttp.ClientSession:
-        """Ensure HTTP session exists."""
+        """
+        Ensure HTTP session exists.
+
+        The session keeps a pool of keep-alive connections to the API so
+        repeated recognize calls skip TCP (and TLS) setup.
+        """
         if self._session is None:
-            self._session = aiohttp.ClientSession()
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32,
+                    limit_per_host=16,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300,
+                ),
+                timeout=aiohttp.ClientTimeout(total=60, connect=5),
+            )
         return self._session
 
     async def aclose(self):
@@ -224,14 +256,18 @@ class SpeechStream(stt_agents.SpeechStream):
         self._language = language
 
         # WebSocket connection
-        self._ws: Optional[websockets.WebSocketClientProtocol] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
 
         # Tasks for managing the stream
         self._send_task: Optional[asyncio.Task] = None
         self._recv_task: Optional[asyncio.Task] = None
 
-        # Audio queue for sending
-        self._audio_queue: asyncio.Queue[Optional[rtc.AudioFrame]] = asyncio.Queue()
+        # Audio queue for sending. Bounded (~2-4 s of 10-20 ms frames) so a
+        # stalled connection drops frames in push_frame() instead of
+        # buffering without limit
+        self._audio_queue: asyncio.Queue[Optional[rtc.AudioFrame]] = asyncio.Queue(
+            maxsize=200
+        )
 
         # Event queue for receiving transcriptions
         self._event_queue: asyncio.Queue[Optional[stt_agents.SpeechEvent]] = asyncio.Queue()
@@ -268,8 +304,12 @@ class SpeechStream(stt_agents.SpeechStream):
             ws_url = self._api_url.replace("http://", "ws://").replace("https://", "wss://")
             ws_url = urljoin(ws_url, "/ws/transcribe")
 
-            # Connect to WebSocket
-            async with websockets.connect(ws_url) as ws:
+            # Connect over the plugin's pooled HTTP session. Protocol-level
+            # pings detect dead peers; audio is PCM, so skip compression.
+            session = await self._stt._ensure_session()
+            async with session.ws_connect(
+                ws_url, heartbeat=20, compress=0, max_msg_size=0
+            ) as ws:
                 self._ws = ws
                 logger.info(f"Connected to STT WebSocket: {ws_url}")
 
@@ -278,12 +318,12 @@ class SpeechStream(stt_agents.SpeechStream):
                     "language": self._language or self._options.language,
                     "sample_rate": self._options.sample_rate,
                     "task": self._options.task,
+                    "interim_results": self._options.interim_results,
                 }
-                await ws.send(json.dumps(config))
+                await ws.send_str(json.dumps(config))
 
                 # Wait for ready message
-                ready_msg = await ws.recv()
-                ready_data = json.loads(ready_msg)
+                ready_data = await ws.receive_json(loads=_json_loads)
                 if ready_data.get("type") != "ready":
                     raise RuntimeError(f"Unexpected response: {ready_data}")
 
@@ -308,26 +348,46 @@ class SpeechStream(stt_agents.SpeechStream):
                 await self._ws.close()
 
     async def _send_loop(self):
-        """Send audio frames to the WebSocket."""
+        """
+        Send audio frames to the WebSocket.
+
+        RTC frames are only 10-20 ms long, so they are coalesced into
+        ~100 ms chunks before sending to cut the number of WebSocket writes
+        while staying well inside the real-time latency budget.
+        """
+        buffer = bytearray()
+        buffered_duration = 0.0
+
         try:
             while not self._closed:
                 frame = await self._audio_queue.get()
 
                 if frame is None:
+                    # Flush whatever audio is still buffered
+                    if buffer and self._ws and not self._ws.closed:
+                        await self._ws.send_bytes(buffer)
+
                     # FIX: Send end-of-stream message to server (industry best practice)
                     # All major STT providers (Deepgram, Google, AWS, Azure) use explicit signaling
                     if self._ws and not self._ws.closed:
                         try:
-                            await self._ws.send(json.dumps({"type": "end_of_stream"}))
+                            await self._ws.send_str(json.dumps({"type": "end_of_stream"}))
                             logger.info("Sent end_of_stream message to server")
                         except Exception as e:
                             logger.warning(f"Failed to send end_of_stream: {e}")
                     break
 
-                if self._ws and not self._ws.closed:
-                    # Convert frame to bytes and send as binary frame
-                    audio_data = frame.data.tobytes()
-                    await self._ws.send(audio_data)
+                # Append the frame's PCM straight from its memoryview
+                buffer += frame.data
+                buffered_duration += frame.samples_per_channel / frame.sample_rate
+
+                if buffered_duration >= _SEND_CHUNK_DURATION and self._ws and not self._ws.closed:
+                    # Send coalesced audio as one binary frame
+                    # aiohttp takes the bytearray as is and copies it while
+                    # masking the frame, so it can be reused afterwards
+                    await self._ws.send_bytes(buffer)
+                    buffer.clear()
+                    buffered_duration = 0.0
 
         except asyncio.CancelledError:
             logger.debug("Send loop cancelled")
@@ -338,26 +398,32 @@ class SpeechStream(stt_agents.SpeechStream):
     async def _recv_loop(self):
         """Receive transcription events from the WebSocket."""
         try:
-            while not self._closed and self._ws:
-                message = await self._ws.recv()
+            async for msg in self._ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                message = msg.data
 
                 # Parse JSON response
                 try:
-                    data = json.loads(message)
+                    data = _json_loads(message)
                 except json.JSONDecodeError:
                     logger.warning(f"Received non-JSON message: {message[:100]}")
                     continue
 
                 event_type = data.get("type")
 
-                if event_type == "final":
-                    # Final transcription result
+                if event_type in ("final", "interim"):
+                    # Final or partial transcription result
                     text = data.get("text", "")
                     confidence = data.get("confidence", 0.0)
 
                     if text:
                         event = stt_agents.SpeechEvent(
-                            type=stt_agents.SpeechEventType.FINAL_TRANSCRIPT,
+                            type=(
+                                stt_agents.SpeechEventType.FINAL_TRANSCRIPT
+                                if event_type == "final"
+                                else stt_agents.SpeechEventType.INTERIM_TRANSCRIPT
+                            ),
                             alternatives=[
                                 stt_agents.SpeechData(
                                     text=text,
@@ -377,11 +443,13 @@ class SpeechStream(stt_agents.SpeechStream):
                     logger.info("Server confirmed session ended")
                     break
 
+            else:
+                # Iteration ends when the connection closes
+                logger.info("WebSocket connection closed by server")
+
         except asyncio.CancelledError:
             logger.debug("Receive loop cancelled")
             raise
-        except websockets.ConnectionClosed:
-            logger.info("WebSocket connection closed by server")
         except Exception as e:
             logger.error(f"Receive loop error: {e}")
 
@@ -401,7 +469,7 @@ class SpeechStream(stt_agents.SpeechStream):
 
                 if self._ws and not self._ws.closed and not self._input_ended:
                     try:
-                        await self._ws.send(json.dumps({"type": "keepalive"}))
+                        await self._ws.send_str(json.dumps({"type": "keepalive"}))
                         logger.debug("Sent keepalive")
                     except Exception as e:
                         logger.warning(f"Keepalive failed: {e}")
@@ -4,18 +4,38 @@ Provides both batch transcription and real-time streaming via WebSocket.
 """
 
 import asyncio
+import functools
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Literal
 from io import BytesIO
 
+import ctranslate2
 import numpy as np
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException, Query
 from fastapi.responses import JSONResponse
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio, pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
 import uvicorn
 
+# orjson is several times faster on the per-message WebSocket path; fall back
+# to the standard library when it is not installed
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,28 +47,121 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Global model instance
+def default_compute_type(device: str) -> str:
+    """
+    Pick the fastest compute type for the device.
+
+    On CUDA, int8 weights with float16 activations use tensor cores; plain
+    int8 would fall back to slower kernels. CPUs run int8 directly.
+    """
+    if device.startswith("cuda"):
+        supported = ctranslate2.get_supported_compute_types("cuda")
+        for compute_type in ("int8_float16", "float16"):
+            if compute_type in supported:
+                return compute_type
+    return "int8"
+
+
+# Global model instance (the first one in the pool)
 model: Optional[WhisperModel] = None
 
+# Model instances that WebSocket sessions are pinned to
+model_pool: Optional["ModelPool"] = None
+
+# Cross-session micro-batchers for streaming chunks, one per pooled model
+# (when batching is enabled)
+batchers: dict[WhisperModel, "WhisperBatcher"] = {}
+
 # Configuration
 MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")  # tiny, base, small, medium, large-v2, large-v3
 DEVICE = os.getenv("WHISPER_DEVICE", "cpu")  # cpu, cuda
-COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # int8, float16, float32
+COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE") or default_compute_type(DEVICE)  # int8, int8_float16, float16, float32
+WHISPER_SAMPLE_RATE = 16000  # Sample rate Whisper models expect
+NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))  # Concurrent transcriptions per model
+MODEL_POOL_SIZE = int(os.getenv("WHISPER_MODEL_POOL_SIZE", "1"))  # Model instances, e.g. one per GPU
+
+# Inference runs off the event loop, at most NUM_WORKERS at a time per model
+# (matching its CTranslate2 workers) so audio keeps being received meanwhile
+inference_executor = ThreadPoolExecutor(
+    max_workers=NUM_WORKERS * MODEL_POOL_SIZE, thread_name_prefix="whisper"
+)
+
+# Streaming chunks waiting for transcription per WebSocket session; beyond
+# this the oldest is dropped to stay real-time
+CHUNK_QUEUE_SIZE = 2
+
+# Micro-batching of concurrent streaming chunks into one encoder/decoder pass
+# (most useful on GPU). A batch size of 1 disables it.
+MAX_BATCH_SIZE = int(os.getenv("WHISPER_MAX_BATCH_SIZE", "1"))
+MAX_BATCH_WAIT_MS = float(os.getenv("WHISPER_MAX_BATCH_WAIT_MS", "20"))
+NO_SPEECH_THRESHOLD = 0.6  # Batched chunks above this are treated as silence
+
+# Streaming policy: "overlap" transcribes fixed 2 s chunks with 0.5 s overlap;
+# "local_agreement" re-decodes a rolling window every second and only emits
+# words that two consecutive decodes agree on (no duplicated words at chunk
+# boundaries, at the cost of decoding the whole window each tick)
+STREAMING_POLICY = os.getenv("WHISPER_STREAMING_POLICY", "overlap")
+AGREEMENT_MAX_BUFFER_SECONDS = 15.0  # Rolling window trimmed after committed words
+
+# Streaming chunks whose RMS (in int16 units) is below this are treated as
+# silence and never reach the model; this replaces Silero VAD per chunk
+SILENCE_RMS = float(os.getenv("WHISPER_SILENCE_RMS", "200"))
+
+# Optional input conditioning of raw PCM (off by default, as Whisper was
+# trained on unfiltered audio): DC offset removal, and a pre-emphasis
+# filter y[n] = x[n] - k * x[n-1] with coefficient k (0 disables it)
+DC_REMOVAL = os.getenv("WHISPER_DC_REMOVAL", "false").lower() == "true"
+PREEMPHASIS = float(os.getenv("WHISPER_PREEMPHASIS", "0"))
 
 
 def load_model():
-    """Load the Whisper model on startup."""
-    global model
-    logger.info(f"Loading Whisper model: {MODEL_SIZE} on {DEVICE} with {COMPUTE_TYPE}")
-    model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
+    """Load the pool of Whisper models on startup."""
+    global model, model_pool
+    logger.info(
+        f"Loading {MODEL_POOL_SIZE} Whisper model(s): {MODEL_SIZE} on {DEVICE} with {COMPUTE_TYPE}"
+    )
+
+    # Spread the instances over the available GPUs
+    num_devices = ctranslate2.get_cuda_device_count() if DEVICE.startswith("cuda") else 1
+    models = [
+        WhisperModel(
+            MODEL_SIZE,
+            device=DEVICE,
+            device_index=i % max(num_devices, 1),
+            compute_type=COMPUTE_TYPE,
+            num_workers=NUM_WORKERS,
+        )
+        for i in range(MODEL_POOL_SIZE)
+    ]
     logger.info("Model loaded successfully")
 
+    # Run one transcription of silence per instance so kernel selection and
+    # workspace allocation happen at startup rather than on the first request
+    for whisper_model in models:
+        transcribe_sync(
+            np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32),
+            whisper_model,
+            language="en",
+            beam_size=1,
+            vad_filter=False,
+        )
+    logger.info("Model warmed up")
+
+    model = models[0]
+    model_pool = ModelPool(models)
+
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize model on startup."""
     load_model()
 
+    if MAX_BATCH_SIZE > 1:
+        # One batcher per instance, so batched chunks stay on their session's model
+        for whisper_model in model_pool.models:
+            batchers[whisper_model] = WhisperBatcher(whisper_model, MAX_BATCH_SIZE, MAX_BATCH_WAIT_MS)
+            batchers[whisper_model].start()
+
 
 @app.get("/")
 async def root():
@@ -74,16 +187,25 @@ async def transcribe_audio(
     task: Literal["transcribe", "translate"] = Query("transcribe", description="Task to perform"),
     beam_size: int = Query(5, description="Beam size for decoding"),
     vad_filter: bool = Query(True, description="Enable VAD filtering"),
+    sample_rate: Optional[int] = Query(None, description="Sample rate of a raw PCM upload"),
+    channels: int = Query(1, description="Channel count of a raw PCM upload"),
+    dtype: Literal["int16"] = Query("int16", description="Sample format of a raw PCM upload"),
 ):
     """
     Transcribe audio file to text.
 
+    When sample_rate is given, the upload is treated as raw interleaved PCM
+    and fed to the model directly, skipping container parsing and decoding.
+
     Args:
-        file: Audio file (WAV, MP3, etc.)
+        file: Audio file (WAV, MP3, etc.), or raw PCM when sample_rate is set
         language: Source language code (auto-detect if None)
         task: 'transcribe' or 'translate' (translate to English)
         beam_size: Beam size for beam search decoding
         vad_filter: Enable voice activity detection filter
+        sample_rate: Sample rate of raw PCM audio
+        channels: Number of interleaved channels of raw PCM audio
+        dtype: Sample format of raw PCM audio
 
     Returns:
         JSON with transcription results
@@ -95,51 +217,186 @@ async def transcribe_audio(
         # Read audio file
         audio_bytes = await file.read()
 
-        # Save to temporary file (faster-whisper requires file path)
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".audio") as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_path = tmp_file.name
+        if sample_rate is not None:
+            audio = pcm16_to_whisper_input(audio_bytes, sample_rate, channels)
+        else:
+            # Decode the container in memory (faster-whisper uses PyAV in-process
+            # and resamples to 16 kHz mono), without a temp file on disk
+            audio = BytesIO(audio_bytes)
+            if DC_REMOVAL or PREEMPHASIS:
+                # Conditioning needs the samples, so decode up front instead
+                # of inside transcribe
+                audio = await asyncio.get_running_loop().run_in_executor(
+                    inference_executor, decode_to_whisper_input, audio
+                )
 
+        whisper_model = model_pool.acquire()
         try:
-            # Transcribe
-            segments, info = model.transcribe(
-                tmp_path,
-                language=language,
-                task=task,
-                beam_size=beam_size,
-                vad_filter=vad_filter,
+            return await asyncio.get_running_loop().run_in_executor(
+                inference_executor,
+                functools.partial(
+                    transcribe_to_response, whisper_model, audio, language, task, beam_size, vad_filter
+                ),
             )
-
-            # Collect all segments
-            results = []
-            full_text = []
-            for segment in segments:
-                results.append({
-                    "start": segment.start,
-                    "end": segment.end,
-                    "text": segment.text.strip(),
-                    "confidence": segment.avg_logprob,
-                })
-                full_text.append(segment.text.strip())
-
-            return JSONResponse({
-                "text": " ".join(full_text),
-                "segments": results,
-                "language": info.language,
-                "language_probability": info.language_probability,
-                "duration": info.duration,
-            })
-
         finally:
-            # Clean up temp file
-            os.unlink(tmp_path)
+            model_pool.release(whisper_model)
 
     except Exception as e:
         logger.error(f"Transcription error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def transcribe_sync(audio, whisper_model: Optional[WhisperModel] = None, **options):
+    """
+    Transcribe audio, materializing the lazy segment generator.
+
+    faster-whisper decodes as segments are iterated, so iterating here keeps
+    all inference inside the calling worker thread.
+
+    Args:
+        audio: Encoded audio file object, or float32 samples at 16 kHz
+        whisper_model: Model instance to use (the global model if None)
+        **options: Options passed to WhisperModel.transcribe
+
+    Returns:
+        Tuple of (list of segments, transcription info)
+    """
+    segments, info = (whisper_model or model).transcribe(audio, **options)
+    return list(segments), info
+
+
+async def transcribe_async(audio, whisper_model: Optional[WhisperModel] = None, **options):
+    """Run transcribe_sync on the inference executor."""
+    return await asyncio.get_running_loop().run_in_executor(
+        inference_executor, functools.partial(transcribe_sync, audio, whisper_model, **options)
+    )
+
+
+def transcribe_to_response(
+    whisper_model: WhisperModel,
+    audio,
+    language: Optional[str],
+    task: str,
+    beam_size: int,
+    vad_filter: bool,
+) -> JSONResponse:
+    """
+    Transcribe audio and build the /transcribe JSON response.
+
+    Args:
+        whisper_model: Model instance to use
+        audio: Encoded audio file object, or float32 samples at 16 kHz
+        language: Source language code (auto-detect if None)
+        task: 'transcribe' or 'translate'
+        beam_size: Beam size for beam search decoding
+        vad_filter: Enable voice activity detection filter
+
+    Returns:
+        JSON with transcription results
+    """
+    segments, info = whisper_model.transcribe(
+        audio,
+        language=language,
+        task=task,
+        beam_size=beam_size,
+        vad_filter=vad_filter,
+    )
+
+    # Collect all segments
+    results = [
+        {
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text.strip(),
+            "confidence": segment.avg_logprob,
+        }
+        for segment in segments
+    ]
+
+    return JSONResponse({
+        "text": " ".join(result["text"] for result in results),
+        "segments": results,
+        "language": info.language,
+        "language_probability": info.language_probability,
+        "duration": info.duration,
+    })
+
+
+def pcm16_to_whisper_input(
+    audio_bytes,
+    sample_rate: int,
+    channels: int = 1,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Convert raw interleaved int16 PCM to Whisper's input format.
+
+    The int16 -> float32 conversion and scaling run as a single pass, into
+    out when a large enough float32 buffer is given. The result is then
+    conditioned with condition_audio.
+
+    Args:
+        audio_bytes: Raw little-endian int16 PCM (any bytes-like object or int16 array)
+        sample_rate: Sample rate of the PCM in Hz
+        channels: Number of interleaved channels
+        out: Optional reusable float32 buffer for the converted samples
+
+    Returns:
+        Mono float32 samples in [-1, 1] at 16 kHz
+    """
+    pcm = np.frombuffer(audio_bytes, dtype=np.int16)
+    if out is not None:
+        out = out[:len(pcm)]
+    audio = np.multiply(pcm, np.float32(1.0 / 32768.0), out=out, dtype=np.float32)
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+
+    if sample_rate != WHISPER_SAMPLE_RATE and len(audio) > 0:
+        # Linear interpolation is adequate for speech recognition input
+        num_samples = int(len(audio) * WHISPER_SAMPLE_RATE / sample_rate)
+        audio = np.interp(
+            np.arange(num_samples) * (sample_rate / WHISPER_SAMPLE_RATE),
+            np.arange(len(audio)),
+            audio,
+        ).astype(np.float32)
+
+    return condition_audio(audio)
+
+
+def decode_to_whisper_input(file) -> np.ndarray:
+    """
+    Decode an encoded audio file to Whisper's input format.
+
+    Uses faster-whisper's in-process PyAV decoder, the same one transcribe
+    applies to file objects, and then conditions the samples with
+    condition_audio.
+
+    Args:
+        file: Encoded audio file object (WAV, MP3, etc.)
+
+    Returns:
+        Mono float32 samples in [-1, 1] at 16 kHz
+    """
+    return condition_audio(decode_audio(file, sampling_rate=WHISPER_SAMPLE_RATE))
+
+
+def condition_audio(audio: np.ndarray) -> np.ndarray:
+    """
+    Apply DC removal and pre-emphasis, when enabled, in place.
+
+    Each step is a single vectorized pass over the float32 samples.
+    """
+    if DC_REMOVAL and len(audio) > 0:
+        audio -= audio.mean()
+    if PREEMPHASIS:
+        # The right-hand side is evaluated into a temporary first, so the
+        # in-place update still reads the unfiltered previous samples
+        audio[1:] -= PREEMPHASIS * audio[:-1]
+
+    return audio
+
+
 @app.websocket("/ws/transcribe")
 async def websocket_transcribe(websocket: WebSocket):
     """
@@ -147,9 +404,10 @@ async def websocket_transcribe(websocket: WebSocket):
 
     Protocol:
     - Client connects and sends configuration as first message:
-      {"language": "en", "sample_rate": 16000, "task": "transcribe"}
+      {"language": "en", "sample_rate": 16000, "task": "transcribe", "interim_results": false}
     - Client sends raw PCM audio data (int16 bytes)
-    - Server responds with transcription events:
+    - Server responds with transcription events (interim ones only when
+      interim_results is enabled):
       {"type": "interim", "text": "partial result"}
       {"type": "final", "text": "final result", "start": 0.0, "end": 2.5}
     """
@@ -157,31 +415,74 @@ async def websocket_transcribe(websocket: WebSocket):
     logger.info("WebSocket client connected")
 
     if model is None:
-        await websocket.send_json({"type": "error", "message": "Model not loaded"})
+        await websocket.send_text(json_dumps({"type": "error", "message": "Model not loaded"}))
         await websocket.close()
         return
 
+    consumer: Optional[asyncio.Task] = None
+    interim_task: Optional[asyncio.Task] = None
+
+    # Every chunk of this session goes through the same model instance
+    whisper_model = model_pool.acquire()
+
     try:
         # Receive configuration
         config_msg = await websocket.receive_text()
-        config = json.loads(config_msg)
+        config = json_loads(config_msg)
 
         language = config.get("language", None)
         sample_rate = config.get("sample_rate", 16000)
         task = config.get("task", "transcribe")
+        interim_results = bool(config.get("interim_results", False))
 
-        logger.info(f"WebSocket config: language={language}, sample_rate={sample_rate}, task={task}")
+        logger.info(
+            f"WebSocket config: language={language}, sample_rate={sample_rate}, task={task}, "
+            f"interim_results={interim_results}"
+        )
 
         # Send acknowledgment
-        await websocket.send_json({
+        await websocket.send_text(json_dumps({
             "type": "ready",
             "message": "Ready to receive audio"
-        })
+        }))
 
-        # Buffer for accumulating audio
-        audio_buffer = bytearray()
-        chunk_duration = 2.0  # Process every 2 seconds of audio
-        bytes_per_chunk = int(sample_rate * chunk_duration * 2)  # 2 bytes per int16 sample
+        # Preallocated int16 buffer for accumulating audio; samples are
+        # written in place and only the overlap is moved after each chunk
+        if STREAMING_POLICY == "local_agreement":
+            # New audio is handed over every second without overlap; the
+            # processor keeps the rolling context itself
+            processor = LocalAgreementProcessor(whisper_model, language, task, interim_results)
+            chunk_duration = 1.0
+            overlap_samples = 0
+        else:
+            processor = None
+            chunk_duration = 2.0  # Process every 2 seconds of audio
+            overlap_samples = int(sample_rate * 0.5)  # 0.5s overlap
+        samples_per_chunk = int(sample_rate * chunk_duration)
+        audio_buffer = np.empty(max(sample_rate * 30, samples_per_chunk), dtype=np.int16)
+        write_idx = 0
+
+        # Chunks are transcribed by a consumer task while this loop keeps
+        # receiving audio. Float32 model inputs use pooled buffers that are
+        # only reused once their chunk has been transcribed or dropped.
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=CHUNK_QUEUE_SIZE)
+        buffer_pool = ChunkBufferPool(samples_per_chunk, CHUNK_QUEUE_SIZE + 2)
+        consumer = asyncio.create_task(
+            _transcribe_chunks(
+                websocket,
+                chunk_queue,
+                buffer_pool,
+                whisper_model,
+                language,
+                task,
+                processor,
+            )
+        )
+
+        # With interim results (overlap policy), the chunk still being
+        # received is decoded greedily once half of it has arrived, at most
+        # one pass in flight and only while transcription keeps up
+        interim_sent = False
 
         while True:
             try:
@@ -189,10 +490,74 @@ async def websocket_transcribe(websocket: WebSocket):
                 # This follows industry best practice from Deepgram, Google, AWS, Azure
                 message = await websocket.receive()
 
+                # Handle binary messages (audio data), the hot path, first
+                data = message.get("bytes")
+                if data is not None:
+                    samples = np.frombuffer(data, dtype=np.int16)
+
+                    end_idx = write_idx + len(samples)
+                    if end_idx > len(audio_buffer):
+                        # Grow for unusually large messages
+                        grown = np.empty(max(2 * len(audio_buffer), end_idx), dtype=np.int16)
+                        grown[:write_idx] = audio_buffer[:write_idx]
+                        audio_buffer = grown
+
+                    audio_buffer[write_idx:end_idx] = samples
+                    write_idx = end_idx
+
+                    if (
+                        interim_results
+                        and processor is None
+                        and not interim_sent
+                        and samples_per_chunk // 2 <= write_idx < samples_per_chunk
+                        and (interim_task is None or interim_task.done())
+                        and chunk_queue.empty()
+                    ):
+                        # Converted into a new array, as the buffer keeps changing
+                        partial = pcm16_to_whisper_input(audio_buffer[:write_idx], sample_rate)
+                        if not is_silent(partial):
+                            interim_task = asyncio.create_task(
+                                _send_interim(websocket, partial, whisper_model, language, task)
+                            )
+                        interim_sent = True
+
+                    # Process when we have enough audio
+                    if write_idx >= samples_per_chunk:
+                        # Normalize to float32 in [-1, 1] at 16 kHz, which the
+                        # model takes directly without any decoding step
+                        float_buffer = buffer_pool.acquire()
+                        audio_float = pcm16_to_whisper_input(
+                            audio_buffer[:samples_per_chunk],
+                            sample_rate,
+                            out=float_buffer,
+                        )
+
+                        # Silent chunks are skipped outright; the agreement
+                        # processor still needs them to keep its timeline, and
+                        # waits for queue space rather than losing audio
+                        if processor is not None:
+                            await chunk_queue.put((audio_float, False, float_buffer))
+                        elif not is_silent(audio_float):
+                            dropped = _put_latest(chunk_queue, (audio_float, False, float_buffer))
+                            if dropped is not None:
+                                buffer_pool.release(dropped[2])
+                        else:
+                            buffer_pool.release(float_buffer)
+
+                        # Move the overlap and any unprocessed samples to the front
+                        keep_from = samples_per_chunk - overlap_samples
+                        audio_buffer[:write_idx - keep_from] = audio_buffer[keep_from:write_idx]
+                        write_idx -= keep_from
+                        interim_sent = False
+
+                elif message["type"] == "websocket.disconnect":
+                    logger.info("WebSocket client disconnected")
+                    break
+
                 # Handle text messages (control messages like end_of_stream, keepalive)
-                if "text" in message:
+                elif message.get("text") is not None:
                     try:
-                        control_msg = json.loads(message["text"])
+                        control_msg = json_loads(message["text"])
                         msg_type = control_msg.get("type")
 
                         if msg_type == "keepalive":
@@ -204,45 +569,27 @@ async def websocket_transcribe(websocket: WebSocket):
                             # FIX: Client signaled end of audio stream
                             logger.info("Received end_of_stream from client")
 
+                            # A pending interim would only arrive after the final result
+                            if interim_task is not None:
+                                interim_task.cancel()
+
                             # Process any remaining audio in buffer
-                            if len(audio_buffer) > 0:
-                                logger.info(f"Processing final {len(audio_buffer)} bytes of audio")
-                                audio_np = np.frombuffer(bytes(audio_buffer), dtype=np.int16)
-                                audio_float = audio_np.astype(np.float32) / 32768.0
-
-                                import tempfile
-                                import soundfile as sf
-
-                                with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                                    sf.write(tmp_file.name, audio_float, sample_rate)
-                                    tmp_path = tmp_file.name
-
-                                try:
-                                    segments, info = model.transcribe(
-                                        tmp_path,
-                                        language=language,
-                                        task=task,
-                                        beam_size=5,  # Higher beam for final segment
-                                        vad_filter=True,
-                                    )
-
-                                    for segment in segments:
-                                        await websocket.send_json({
-                                            "type": "final",
-                                            "text": segment.text.strip(),
-                                            "start": segment.start,
-                                            "end": segment.end,
-                                            "confidence": segment.avg_logprob,
-                                        })
-
-                                finally:
-                                    os.unlink(tmp_path)
+                            # The agreement processor also commits its pending words here
+                            if write_idx > 0 or processor is not None:
+                                logger.info(f"Processing final {write_idx} samples of audio")
+                                audio_float = pcm16_to_whisper_input(audio_buffer[:write_idx], sample_rate)
+                                if processor is not None or not is_silent(audio_float):
+                                    await chunk_queue.put((audio_float, True, None))
+
+                            # Wait for every queued chunk to be transcribed and sent
+                            await chunk_queue.put(None)
+                            await consumer
 
                             # Send session end confirmation (graceful shutdown pattern)
-                            await websocket.send_json({
+                            await websocket.send_text(json_dumps({
                                 "type": "session_ended",
                                 "message": "Transcription session completed"
-                            })
+                            }))
 
                             logger.info("Session ended gracefully")
                             break  # Exit loop, connection will close
@@ -254,52 +601,6 @@ async def websocket_transcribe(websocket: WebSocket):
                         logger.warning(f"Received invalid JSON: {message['text'][:100]}")
                         continue
 
-                # Handle binary messages (audio data)
-                elif "bytes" in message:
-                    data = message["bytes"]
-                    audio_buffer.extend(data)
-
-                    # Process when we have enough audio
-                    if len(audio_buffer) >= bytes_per_chunk:
-                        # Convert bytes to numpy array
-                        audio_np = np.frombuffer(bytes(audio_buffer[:bytes_per_chunk]), dtype=np.int16)
-                        audio_float = audio_np.astype(np.float32) / 32768.0  # Normalize to [-1, 1]
-
-                        # Save to temp file for processing
-                        import tempfile
-                        import soundfile as sf
-
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                            sf.write(tmp_file.name, audio_float, sample_rate)
-                            tmp_path = tmp_file.name
-
-                        try:
-                            # Transcribe chunk
-                            segments, info = model.transcribe(
-                                tmp_path,
-                                language=language,
-                                task=task,
-                                beam_size=3,  # Lower beam size for faster processing
-                                vad_filter=True,
-                            )
-
-                            # Send results
-                            for segment in segments:
-                                await websocket.send_json({
-                                    "type": "final",
-                                    "text": segment.text.strip(),
-                                    "start": segment.start,
-                                    "end": segment.end,
-                                    "confidence": segment.avg_logprob,
-                                })
-
-                        finally:
-                            os.unlink(tmp_path)
-
-                            # Remove processed audio from buffer, keep overlap
-                            overlap_bytes = int(sample_rate * 0.5 * 2)  # 0.5s overlap
-                            audio_buffer = audio_buffer[bytes_per_chunk - overlap_bytes:]
-
                 else:
                     logger.warning(f"Received unknown message type: {list(message.keys())}")
 
@@ -309,10 +610,10 @@ async def websocket_transcribe(websocket: WebSocket):
             except Exception as e:
                 logger.error(f"WebSocket processing error: {e}")
                 try:
-                    await websocket.send_json({
+                    await websocket.send_text(json_dumps({
                         "type": "error",
                         "message": str(e)
-                    })
+                    }))
                 except:
                     pass  # Connection might be closed
 
@@ -320,6 +621,12 @@ async def websocket_transcribe(websocket: WebSocket):
         logger.error(f"WebSocket error: {e}")
 
     finally:
+        if consumer is not None and not consumer.done():
+            consumer.cancel()
+        if interim_task is not None and not interim_task.done():
+            interim_task.cancel()
+        model_pool.release(whisper_model)
+
         # Close WebSocket with proper close code (1000 = normal closure)
         try:
             await websocket.close(code=1000)
@@ -328,11 +635,470 @@ async def websocket_transcribe(websocket: WebSocket):
             logger.debug(f"Error closing websocket: {e}")
 
 
+async def _transcribe_chunks(
+    websocket: WebSocket,
+    chunk_queue: asyncio.Queue,
+    buffer_pool: "ChunkBufferPool",
+    whisper_model: WhisperModel,
+    language: Optional[str],
+    task: str,
+    processor: Optional["LocalAgreementProcessor"] = None,
+):
+    """
+    Transcribe queued (audio, is_final, buffer) chunks and send the results.
+
+    Runs until the None sentinel, so inference on one chunk overlaps with
+    receiving the next. Interim chunks go through whisper_model's
+    cross-session batcher when batching is enabled. With a
+    LocalAgreementProcessor, chunks are appended to its rolling window
+    instead of being transcribed on their own.
+    Each chunk's pooled buffer (None if unpooled) is released once done.
+    """
+    loop = asyncio.get_running_loop()
+    batcher = batchers.get(whisper_model)
+
+    while True:
+        item = await chunk_queue.get()
+        if item is None:
+            return
+
+        audio_float, is_final, float_buffer = item
+        try:
+            if processor is not None:
+                processor.insert_audio(audio_float)
+                messages = await loop.run_in_executor(
+                    inference_executor, processor.process, is_final
+                )
+            elif batcher is not None and not is_final:
+                messages = await batcher.submit(audio_float, language, task)
+            else:
+                segments, info = await transcribe_async(
+                    audio_float,
+                    whisper_model,
+                    language=language,
+                    task=task,
+                    beam_size=5 if is_final else 3,  # Lower beam for interim chunks
+                    vad_filter=False,  # Silent chunks were already gated out
+                )
+                messages = [segment_message(segment) for segment in segments]
+
+            # Send results
+            for message in messages:
+                await websocket.send_text(json_dumps(message))
+
+        except Exception as e:
+            logger.error(f"Chunk transcription error: {e}")
+            try:
+                await websocket.send_text(json_dumps({
+                    "type": "error",
+                    "message": str(e)
+                }))
+            except Exception:
+                pass  # Connection might be closed
+
+        finally:
+            if float_buffer is not None:
+                buffer_pool.release(float_buffer)
+
+
+async def _send_interim(
+    websocket: WebSocket,
+    audio_float: np.ndarray,
+    whisper_model: WhisperModel,
+    language: Optional[str],
+    task: str,
+):
+    """Send a greedy transcription of partially received audio as an interim event."""
+    try:
+        segments, _ = await transcribe_async(
+            audio_float,
+            whisper_model,
+            language=language,
+            task=task,
+            beam_size=1,
+            vad_filter=False,
+            without_timestamps=True,
+            condition_on_previous_text=False,
+        )
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if text:
+            await websocket.send_text(json_dumps({"type": "interim", "text": text}))
+    except Exception as e:
+        logger.error(f"Interim transcription error: {e}")
+
+
+def segment_message(segment) -> dict:
+    """Build the WebSocket result message for a transcribed segment."""
+    return {
+        "type": "final",
+        "text": segment.text.strip(),
+        "start": segment.start,
+        "end": segment.end,
+        "confidence": segment.avg_logprob,
+    }
+
+
+def transcribe_batch_sync(
+    whisper_model: WhisperModel,
+    audios: list[np.ndarray],
+    languages: list[Optional[str]],
+    tasks: list[str],
+    beam_size: int = 3,
+) -> list[list[dict]]:
+    """
+    Transcribe several short (< 30 s) chunks in one batched model pass.
+
+    Features are padded to Whisper's 30 s window and stacked, so the encoder
+    and the decoder each run once for the whole batch. Chunks are decoded
+    without timestamps, and chunks the model judges to be silence are
+    skipped in place of VAD filtering.
+
+    Returns:
+        Per-chunk lists of WebSocket result messages
+    """
+    features = np.stack([
+        pad_or_trim(whisper_model.feature_extractor(audio), whisper_model.feature_extractor.nb_max_frames)
+        for audio in audios
+    ])
+    encoder_output = whisper_model.encode(features)
+
+    multilingual = whisper_model.model.is_multilingual
+    if not multilingual:
+        languages = ["en"] * len(audios)
+    elif any(language is None for language in languages):
+        # Detected language tokens look like "<|en|>"
+        detected = whisper_model.model.detect_language(encoder_output)
+        languages = [
+            language or detected[i][0][0][2:-2] for i, language in enumerate(languages)
+        ]
+
+    tokenizers = [
+        Tokenizer(whisper_model.hf_tokenizer, multilingual, task=task, language=language)
+        for language, task in zip(languages, tasks)
+    ]
+    prompts = [
+        whisper_model.get_prompt(tokenizer, [], without_timestamps=True) for tokenizer in tokenizers
+    ]
+
+    results = whisper_model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=beam_size,
+        return_scores=True,
+        return_no_speech_prob=True,
+    )
+
+    batch_messages = []
+    for audio, tokenizer, result in zip(audios, tokenizers, results):
+        text = tokenizer.decode(result.sequences_ids[0]).strip()
+        if not text or result.no_speech_prob > NO_SPEECH_THRESHOLD:
+            batch_messages.append([])
+            continue
+
+        batch_messages.append([{
+            "type": "final",
+            "text": text,
+            "start": 0.0,
+            "end": len(audio) / WHISPER_SAMPLE_RATE,
+            "confidence": result.scores[0],
+        }])
+
+    return batch_messages
+
+
+class WhisperBatcher:
+    """
+    Micro-batcher for streaming transcription on one pooled model.
+
+    Chunks submitted by concurrent WebSocket sessions pinned to that model
+    within a short window are transcribed together in one batched
+    encoder/decoder pass, and each caller's future receives its own result
+    messages.
+    """
+
+    def __init__(self, whisper_model: WhisperModel, max_batch_size: int, max_wait_ms: float):
+        self._whisper_model = whisper_model
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue[tuple[np.ndarray, Optional[str], str, asyncio.Future]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background batching task."""
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, audio: np.ndarray, language: Optional[str], task: str) -> list[dict]:
+        """
+        Queue a chunk for transcription.
+
+        Args:
+            audio: Float32 samples at 16 kHz
+            language: Source language code (auto-detect if None)
+            task: 'transcribe' or 'translate'
+
+        Returns:
+            WebSocket result messages for this chunk
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((audio, language, task, future))
+        return await future
+
+    async def _run(self):
+        """Drain the queue in batches and run them on the inference executor."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # Block for the first item, then collect more until the window closes
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            audios = [audio for audio, _, _, _ in batch]
+            languages = [language for _, language, _, _ in batch]
+            tasks = [task for _, _, task, _ in batch]
+
+            try:
+                results = await loop.run_in_executor(
+                    inference_executor,
+                    functools.partial(transcribe_batch_sync, self._whisper_model, audios, languages, tasks),
+                )
+            except Exception as e:
+                logger.error(f"Batch transcription error: {e}")
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, _, _, future), messages in zip(batch, results):
+                if not future.done():
+                    future.set_result(messages)
+
+
+class LocalAgreementProcessor:
+    """
+    Streaming transcription with the LocalAgreement-2 policy.
+
+    Audio accumulates in a rolling window that is re-transcribed with word
+    timestamps on every tick. Words are committed once two consecutive
+    hypotheses agree on them, and the window is trimmed up to the last
+    committed word so it stays bounded. Times are relative to the start of
+    the stream. With interim_results, the words still awaiting agreement are
+    reported as an "interim" event after each tick.
+    """
+
+    def __init__(
+        self,
+        whisper_model: WhisperModel,
+        language: Optional[str],
+        task: str,
+        interim_results: bool = False,
+    ):
+        self._model = whisper_model
+        self._language = language
+        self._task = task
+        self._interim_results = interim_results
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._audio_offset = 0.0  # Stream time at the start of the window
+        self._committed_end = 0.0  # Stream time where the last committed word ends
+        self._committed_tail: list[str] = []  # Last few committed words
+        self._hypothesis: list[tuple[float, float, str, float]] = []  # Uncommitted words
+
+    def insert_audio(self, audio: np.ndarray):
+        """Append float32 samples at 16 kHz to the window (copies the data)."""
+        self._audio = np.concatenate((self._audio, audio))
+
+    def process(self, is_final: bool = False) -> list[dict]:
+        """
+        Re-transcribe the window and commit the words that are now agreed on.
+
+        Runs inference synchronously; call it from the inference executor.
+
+        Args:
+            is_final: Commit every remaining word, as no more audio follows
+
+        Returns:
+            WebSocket result messages for newly committed words, followed
+            by an interim message for the pending ones if enabled
+        """
+        if self._audio.size == 0:
+            return []
+
+        segments, _ = self._model.transcribe(
+            self._audio,
+            language=self._language,
+            task=self._task,
+            beam_size=5 if is_final else 3,
+            vad_filter=True,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+        )
+
+        # Words from the window in stream time, skipping those already committed
+        words = [
+            (self._audio_offset + w.start, self._audio_offset + w.end, w.word.strip(), w.probability)
+            for segment in segments
+            for w in segment.words
+            if self._audio_offset + w.start > self._committed_end - 0.1
+        ]
+        words = self._drop_committed_overlap(words)
+
+        if is_final:
+            committed = words
+            self._hypothesis = []
+        else:
+            # Commit the longest prefix both hypotheses agree on
+            agreed = 0
+            while (
+                agreed < min(len(words), len(self._hypothesis))
+                and words[agreed][2].lower() == self._hypothesis[agreed][2].lower()
+            ):
+                agreed += 1
+            committed = words[:agreed]
+            self._hypothesis = words[agreed:]
+
+        messages = self._commit(committed)
+        self._trim_window()
+        if self._interim_results and self._hypothesis:
+            messages.append({
+                "type": "interim",
+                "text": " ".join(w[2] for w in self._hypothesis),
+            })
+        return messages
+
+    def _commit(self, committed) -> list[dict]:
+        """Record newly committed words and build their final message."""
+        if not committed:
+            return []
+
+        self._committed_end = committed[-1][1]
+        self._committed_tail = (self._committed_tail + [w[2] for w in committed])[-5:]
+
+        return [{
+            "type": "final",
+            "text": " ".join(w[2] for w in committed),
+            "start": committed[0][0],
+            "end": committed[-1][1],
+            "confidence": float(np.mean([w[3] for w in committed])),
+        }]
+
+    def _trim_window(self):
+        """
+        Keep the window within AGREEMENT_MAX_BUFFER_SECONDS.
+
+        Audio is cut at the last committed word when that is enough, and
+        otherwise down to the most recent AGREEMENT_MAX_BUFFER_SECONDS, so
+        the window stays bounded through silence or long uncommitted speech.
+        """
+        max_samples = int(AGREEMENT_MAX_BUFFER_SECONDS * WHISPER_SAMPLE_RATE)
+        if len(self._audio) <= max_samples:
+            return
+
+        cut = int((self._committed_end - self._audio_offset) * WHISPER_SAMPLE_RATE)
+        cut = max(cut, len(self._audio) - max_samples)
+        self._audio = self._audio[cut:]
+        self._audio_offset += cut / WHISPER_SAMPLE_RATE
+
+    def _drop_committed_overlap(self, words):
+        """Drop leading words that repeat the tail of the committed text."""
+        for n in range(min(len(self._committed_tail), len(words), 5), 0, -1):
+            tail = [w.lower() for w in self._committed_tail[-n:]]
+            head = [w[2].lower() for w in words[:n]]
+            if tail == head:
+                return words[n:]
+        return words
+
+
+class ModelPool:
+    """
+    Model instances shared out to WebSocket sessions and requests.
+
+    Each caller is pinned to the instance with the fewest current users for
+    as long as it holds it, so a session's chunks all reuse the same
+    CTranslate2 model and its warm allocator caches. Instances are shared
+    rather than held exclusively, so callers never wait for one to be free.
+    """
+
+    def __init__(self, models: list[WhisperModel]):
+        self.models = models
+        self._users = {whisper_model: 0 for whisper_model in models}
+
+    def acquire(self) -> WhisperModel:
+        """Pin the caller to the least used instance."""
+        whisper_model = min(self._users, key=self._users.get)
+        self._users[whisper_model] += 1
+        return whisper_model
+
+    def release(self, whisper_model: WhisperModel):
+        """Unpin a caller from an instance returned by acquire()."""
+        self._users[whisper_model] -= 1
+
+
+class ChunkBufferPool:
+    """
+    Reusable float32 buffers for streaming chunks.
+
+    A buffer handed out by acquire() stays out of circulation until it is
+    released, after its chunk has been transcribed or dropped, so it is
+    never overwritten while inference may still be reading it.
+    """
+
+    def __init__(self, size: int, count: int):
+        self._size = size
+        self._free = [np.empty(size, dtype=np.float32) for _ in range(count)]
+
+    def acquire(self) -> np.ndarray:
+        """Take a free buffer, allocating a new one if all are in use."""
+        if self._free:
+            return self._free.pop()
+        return np.empty(self._size, dtype=np.float32)
+
+    def release(self, buffer: np.ndarray):
+        """Return a buffer from acquire() once nothing reads it anymore."""
+        self._free.append(buffer)
+
+
+def is_silent(audio: np.ndarray) -> bool:
+    """Whether float32 audio's RMS level is below SILENCE_RMS."""
+    if audio.size == 0:
+        return True
+    # dot() computes the sum of squares in one pass without a temporary array
+    rms = np.sqrt(np.dot(audio, audio) / audio.size) * 32768.0
+    return rms < SILENCE_RMS
+
+
+def _put_latest(chunk_queue: asyncio.Queue, item):
+    """
+    Queue a chunk, dropping the oldest queued one if transcription is behind.
+
+    Returns:
+        The dropped item, or None if nothing was dropped
+    """
+    dropped = None
+    if chunk_queue.full():
+        dropped = chunk_queue.get_nowait()
+        logger.warning("Transcription falling behind real time, dropped oldest chunk")
+    chunk_queue.put_nowait(item)
+    return dropped
+
+
 if __name__ == "__main__":
+    # Each worker loads its own model copy; run the CUDA MPS daemon
+    # (nvidia-cuda-mps-control -d) to share one GPU between workers
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        workers=int(os.getenv("STT_WORKERS", "1")),
         reload=False,
         log_level="info"
     )
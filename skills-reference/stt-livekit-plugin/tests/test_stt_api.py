@@ -0,0 +1,327 @@
+"""
+Unit tests for the STT API's streaming logic, without a real model:
+- pcm16_to_whisper_input conversion, mixdown, resampling and out= reuse
+- is_silent RMS gating
+- DC removal and pre-emphasis of encoded uploads
+- Chunk buffers are never overwritten while still being transcribed
+- Cross-session batching stays on each session's pooled model
+- LocalAgreementProcessor commit policy, window bounds and timeline
+"""
+
+import asyncio
+import importlib.util
+import io
+import os
+import sys
+import time
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faster_whisper")
+from fastapi.testclient import TestClient
+
+# Loaded under its own name: the TTS API's tests also load a main.py
+STT_API_MAIN = os.path.join(os.path.dirname(__file__), '..', 'stt-api', 'main.py')
+spec = importlib.util.spec_from_file_location("stt_api_main", STT_API_MAIN)
+stt_api = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = stt_api
+spec.loader.exec_module(stt_api)
+
+
+SAMPLE_RATE = stt_api.WHISPER_SAMPLE_RATE
+
+
+def generate_noise(duration=1.0, sample_rate=SAMPLE_RATE, seed=0):
+    """Generate loud int16 noise that is never gated out as silence."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(-16000, 16000, int(sample_rate * duration), dtype=np.int16)
+
+
+class ScriptedWhisperModel:
+    """Stand-in for WhisperModel returning one scripted word list per call."""
+
+    def __init__(self, hypotheses=()):
+        self._hypotheses = list(hypotheses)
+        self.window_lengths = []
+
+    def transcribe(self, audio, **options):
+        self.window_lengths.append(len(audio))
+        words = self._hypotheses.pop(0) if self._hypotheses else []
+        segments = []
+        if words:
+            segments.append(SimpleNamespace(words=[
+                SimpleNamespace(start=start, end=end, word=f" {word}", probability=0.9)
+                for start, end, word in words
+            ]))
+        return iter(segments), SimpleNamespace(language="en")
+
+
+class SlowWhisperModel:
+    """Stand-in for WhisperModel that is slower than real time."""
+
+    def __init__(self, delay=0.3):
+        self._delay = delay
+        self.calls = 0
+        self.modified_inputs = 0
+        self.window_lengths = []
+
+    def transcribe(self, audio, **options):
+        before = np.array(audio, copy=True)
+        time.sleep(self._delay)
+        self.calls += 1
+        self.window_lengths.append(len(audio))
+        if not np.array_equal(before, audio):
+            self.modified_inputs += 1
+        return iter([]), SimpleNamespace(language="en")
+
+
+# ---------------------------------------------------------------------------
+# pcm16_to_whisper_input / is_silent
+# ---------------------------------------------------------------------------
+
+def test_pcm16_scaling():
+    """int16 samples are scaled to float32 in [-1, 1]."""
+    pcm = np.array([0, 16384, -32768], dtype=np.int16)
+
+    audio = stt_api.pcm16_to_whisper_input(pcm.tobytes(), SAMPLE_RATE)
+
+    assert audio.dtype == np.float32
+    np.testing.assert_allclose(audio, [0.0, 0.5, -1.0])
+
+
+def test_pcm16_stereo_mixdown():
+    """Interleaved channels are averaged to mono."""
+    pcm = np.array([16384, 0, -16384, -16384], dtype=np.int16)
+
+    audio = stt_api.pcm16_to_whisper_input(pcm.tobytes(), SAMPLE_RATE, channels=2)
+
+    np.testing.assert_allclose(audio, [0.25, -0.5])
+
+
+def test_pcm16_resamples_to_16khz():
+    """Audio at other rates is resampled to 16 kHz."""
+    pcm = generate_noise(duration=0.5, sample_rate=8000)
+
+    audio = stt_api.pcm16_to_whisper_input(pcm, 8000)
+
+    assert audio.dtype == np.float32
+    assert len(audio) == SAMPLE_RATE // 2
+
+
+def test_pcm16_writes_into_out_buffer():
+    """A large enough out buffer is reused instead of allocating."""
+    pcm = generate_noise(duration=0.1)
+    out = np.empty(len(pcm) * 2, dtype=np.float32)
+
+    audio = stt_api.pcm16_to_whisper_input(pcm, SAMPLE_RATE, out=out)
+
+    assert len(audio) == len(pcm)
+    assert np.shares_memory(audio, out)
+
+
+def test_is_silent():
+    """Chunks below SILENCE_RMS are silent; speech-level audio is not."""
+    assert stt_api.is_silent(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    assert stt_api.is_silent(np.zeros(0, dtype=np.float32))
+
+    loud = stt_api.pcm16_to_whisper_input(generate_noise(), SAMPLE_RATE)
+    assert not stt_api.is_silent(loud)
+
+
+def test_encoded_upload_is_conditioned(monkeypatch):
+    """Encoded uploads get DC removal and pre-emphasis like raw PCM does."""
+    monkeypatch.setattr(stt_api, "DC_REMOVAL", True)
+    monkeypatch.setattr(stt_api, "PREEMPHASIS", 0.97)
+    pcm = generate_noise() // 2 + 8000  # Noise with a DC offset
+
+    upload = io.BytesIO()
+    with wave.open(upload, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm.tobytes())
+    upload.seek(0)
+
+    audio = stt_api.decode_to_whisper_input(upload)
+
+    expected = pcm / 32768.0
+    expected -= expected.mean()
+    expected[1:] -= 0.97 * expected[:-1]
+    np.testing.assert_allclose(audio, expected, atol=1e-5)
+
+
+# ---------------------------------------------------------------------------
+# Chunk buffer lifetime
+# ---------------------------------------------------------------------------
+
+def test_buffer_pool_never_hands_out_busy_buffer():
+    """Buffers of queued or in-flight chunks are never handed out again."""
+    pool = stt_api.ChunkBufferPool(16, stt_api.CHUNK_QUEUE_SIZE + 2)
+    queue = asyncio.Queue(maxsize=stt_api.CHUNK_QUEUE_SIZE)
+    queued = []
+
+    # One chunk is being transcribed while the producer keeps going
+    in_flight = pool.acquire()
+
+    for _ in range(10):
+        buffer = pool.acquire()
+        assert buffer is not in_flight
+        assert all(buffer is not other for other in queued)
+
+        queued.append(buffer)
+        dropped = stt_api._put_latest(queue, (buffer, False, buffer))
+        if dropped is not None:
+            queued = [other for other in queued if other is not dropped[2]]
+            pool.release(dropped[2])
+
+    assert queue.qsize() == len(queued)
+
+
+@pytest.fixture
+def slow_server(monkeypatch):
+    """Serve WebSocket sessions with a slower-than-real-time model."""
+    whisper_model = SlowWhisperModel()
+    monkeypatch.setattr(stt_api, "model", whisper_model)
+    monkeypatch.setattr(stt_api, "model_pool", stt_api.ModelPool([whisper_model]))
+    monkeypatch.setattr(stt_api, "batchers", {})
+    return whisper_model
+
+
+def _stream(audio_chunks, client=None):
+    """Stream int16 chunks over the WebSocket and wait for the session to end."""
+    # Without a context manager the startup event (model loading) does not run
+    client = client or TestClient(stt_api.app)
+    with client.websocket_connect("/ws/transcribe") as ws:
+        ws.send_json({"language": "en", "sample_rate": SAMPLE_RATE})
+        assert ws.receive_json()["type"] == "ready"
+
+        for chunk in audio_chunks:
+            ws.send_bytes(chunk.tobytes())
+        ws.send_json({"type": "end_of_stream"})
+
+        while ws.receive_json()["type"] != "session_ended":
+            pass
+
+
+def test_chunks_not_overwritten_while_transcribing(slow_server, monkeypatch):
+    """Dropping chunks never recycles a buffer the model is still reading."""
+    monkeypatch.setattr(stt_api, "STREAMING_POLICY", "overlap")
+
+    _stream([generate_noise(duration=2.0, seed=i) for i in range(7)])
+
+    assert slow_server.calls > 0
+    assert slow_server.modified_inputs == 0
+
+
+def test_batched_chunks_stay_on_pinned_model(monkeypatch):
+    """Each pooled model gets its own batcher, used by the sessions pinned to it."""
+    held, pinned = SlowWhisperModel(delay=0), SlowWhisperModel(delay=0)
+    model_pool = stt_api.ModelPool([held, pinned])
+    model_pool.acquire()  # Another session holds the first model
+    batched_on = []
+
+    def transcribe_batch_sync(whisper_model, audios, languages, tasks):
+        batched_on.append(whisper_model)
+        return [[] for _ in audios]
+
+    monkeypatch.setattr(stt_api, "load_model", lambda: None)
+    monkeypatch.setattr(stt_api, "model", held)
+    monkeypatch.setattr(stt_api, "model_pool", model_pool)
+    monkeypatch.setattr(stt_api, "batchers", {})
+    monkeypatch.setattr(stt_api, "transcribe_batch_sync", transcribe_batch_sync)
+    monkeypatch.setattr(stt_api, "MAX_BATCH_SIZE", 4)
+    monkeypatch.setattr(stt_api, "STREAMING_POLICY", "overlap")
+
+    # The context manager runs the startup event, which starts the batchers
+    with TestClient(stt_api.app) as client:
+        _stream([generate_noise(duration=2.0, seed=i) for i in range(3)], client)
+
+    assert set(stt_api.batchers) == {held, pinned}
+    assert batched_on and all(whisper_model is pinned for whisper_model in batched_on)
+
+
+def test_local_agreement_receives_all_audio(slow_server, monkeypatch):
+    """The agreement processor gets every chunk even when inference is behind."""
+    monkeypatch.setattr(stt_api, "STREAMING_POLICY", "local_agreement")
+
+    _stream([generate_noise(duration=1.0, seed=i) for i in range(7)])
+
+    assert slow_server.modified_inputs == 0
+    assert max(slow_server.window_lengths) == 7 * SAMPLE_RATE
+
+
+# ---------------------------------------------------------------------------
+# LocalAgreementProcessor
+# ---------------------------------------------------------------------------
+
+def test_local_agreement_commits_agreed_prefix():
+    """Words are committed once two consecutive hypotheses agree on them."""
+    whisper_model = ScriptedWhisperModel([
+        [(0.0, 0.5, "hello"), (0.5, 1.0, "world")],
+        [(0.0, 0.5, "hello"), (0.5, 1.0, "world"), (1.0, 1.5, "again")],
+        [(0.0, 0.5, "hello"), (0.5, 1.0, "world"), (1.0, 1.5, "again")],
+    ])
+    processor = stt_api.LocalAgreementProcessor(whisper_model, "en", "transcribe")
+
+    processor.insert_audio(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    assert processor.process() == []
+
+    processor.insert_audio(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    messages = processor.process()
+    assert [m["text"] for m in messages] == ["hello world"]
+    assert messages[0]["start"] == 0.0
+    assert messages[0]["end"] == 1.0
+
+    # The final tick commits the rest without repeating committed words
+    messages = processor.process(is_final=True)
+    assert [m["text"] for m in messages] == ["again"]
+
+
+def test_local_agreement_reports_pending_words_as_interim():
+    """With interim results, uncommitted words follow as an interim event."""
+    whisper_model = ScriptedWhisperModel([[(0.0, 0.5, "hello")]])
+    processor = stt_api.LocalAgreementProcessor(
+        whisper_model, "en", "transcribe", interim_results=True
+    )
+
+    processor.insert_audio(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+    assert processor.process() == [{"type": "interim", "text": "hello"}]
+
+
+def test_local_agreement_window_bounded_without_commits():
+    """The window is capped every tick, even when nothing is committed."""
+    whisper_model = ScriptedWhisperModel()
+    processor = stt_api.LocalAgreementProcessor(whisper_model, "en", "transcribe")
+    max_seconds = stt_api.AGREEMENT_MAX_BUFFER_SECONDS
+
+    for _ in range(40):
+        processor.insert_audio(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        processor.process()
+
+    # Each decode sees at most the capped window plus the newest second
+    assert max(whisper_model.window_lengths) <= (max_seconds + 1) * SAMPLE_RATE
+
+    # Trimmed audio advances the stream offset by exactly its duration
+    assert processor._audio_offset == pytest.approx(40 - max_seconds)
+
+
+def test_local_agreement_timestamps_follow_trimmed_window():
+    """Word times stay stream-relative after the window has been trimmed."""
+    max_seconds = int(stt_api.AGREEMENT_MAX_BUFFER_SECONDS)
+    silent_ticks = max_seconds + 5
+    whisper_model = ScriptedWhisperModel(
+        [[]] * silent_ticks + [[(0.2, 0.6, "hi")], [(0.2, 0.6, "hi")]]
+    )
+    processor = stt_api.LocalAgreementProcessor(whisper_model, "en", "transcribe")
+
+    for _ in range(silent_ticks + 2):
+        processor.insert_audio(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        messages = processor.process()
+
+    # The window starts at stream time (ticks - cap) when "hi" is committed
+    assert [m["text"] for m in messages] == ["hi"]
+    assert messages[0]["start"] == pytest.approx(silent_ticks + 1 - max_seconds + 0.2)
@@ -5,19 +5,19 @@ Text-to-Speech plugin for LiveKit using custom self-hosted TTS API.
 import asyncio
 import logging
 import json
-import base64
 from dataclasses import dataclass
 from typing import Optional
-from urllib.parse import urljoin
 
 import aiohttp
 import websockets
-import numpy as np
+from websockets.asyncio.client import ClientConnection, connect as ws_connect
 from livekit import agents, rtc
 from livekit.agents import tts as tts_agents, utils
 
 logger = logging.getLogger(__name__)
 
+_END_OF_STREAM_MSG = json.dumps({"type": "end_of_stream"})
+
 
 @dataclass
 class TTSOptions:
@@ -32,6 +32,9 @@ class TTSOptions:
     format: str = "wav"
     """Audio format: wav, mp3, or raw."""
 
+    max_buffered_frames: int = 16
+    """Maximum synthesized chunks buffered ahead of the consumer (backpressure)."""
+
 
 class TTS(tts_agents.TTS):
     """
@@ -69,6 +72,16 @@ class TTS(tts_agents.TTS):
         self._session = http_session
         self._own_session = http_session is None
 
+        # Connection settings are constant per instance, so build them once
+        # here instead of on every synthesize() call
+        self._ws_url = self._api_url.replace("http", "ws", 1) + "/ws/synthesize"
+        self._config_payload = json.dumps(
+            {
+                "voice_description": self._options.voice_description,
+                "sample_rate": self._options.sample_rate,
+            }
+        )
+
     def synthesize(
         self,
         text: str,
@@ -85,7 +98,6 @@ class TTS(tts_agents.TTS):
         return ChunkedStream(
             tts=self,
             text=text,
-            api_url=self._api_url,
             options=self._options,
         )
 
@@ -115,39 +127,30 @@ class ChunkedStream(tts_agents.ChunkedStream):
         *,
         tts: TTS,
         text: str,
-        api_url: str,
         options: TTSOptions,
     ):
         super().__init__(tts=tts, input_text=text)
 
         self._tts = tts
         self._text = text
-        self._api_url = api_url
         self._options = options
 
         # WebSocket connection
-        self._ws: Optional[websockets.WebSocketClientProtocol] = None
-
-        # Tasks for managing the stream
-        self._send_task: Optional[asyncio.Task] = None
-        self._recv_task: Optional[asyncio.Task] = None
+        self._ws: Optional[ClientConnection] = None
 
-        # Text queue for sending
-        self._text_queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
-
-        # Audio queue for receiving synthesized audio
-        self._audio_queue: asyncio.Queue[Optional[tts_agents.SynthesizedAudio]] = asyncio.Queue()
+        # Audio queue for receiving synthesized audio. Bounded so a stalled
+        # consumer pauses the WebSocket read instead of growing memory
+        self._audio_queue: asyncio.Queue[Optional[tts_agents.SynthesizedAudio]] = asyncio.Queue(
+            maxsize=options.max_buffered_frames
+        )
 
         # State tracking
         self._closed = False
-        self._input_ended = False
         self._main_task: Optional[asyncio.Task] = None
 
-        # Keepalive for long connections
-        self._keepalive_task: Optional[asyncio.Task] = None
-
-        # Segment ID tracking
-        self._segment_id = 0
+        # A ChunkedStream is a single segment, so every frame shares one id.
+        # Built once here rather than formatting a new string per frame
+        self._segment_id = utils.shortuuid()
 
     def __aiter__(self):
         """Initialize async iteration and start the main task."""
@@ -167,23 +170,26 @@ class ChunkedStream(tts_agents.ChunkedStream):
         return audio
 
     async def _run(self):
-        """Main execution loop for the stream."""
+        """
+        Main execution loop for the stream.
+
+        The protocol is request-then-stream: the whole input text is sent up
+        front, followed by end_of_stream, and audio is read back until the
+        server reports completion. Running this linearly in one coroutine
+        avoids separate send/receive tasks and the queue hops between them.
+        """
         try:
-            # Build WebSocket URL
-            ws_url = self._api_url.replace("http://", "ws://").replace("https://", "wss://")
-            ws_url = urljoin(ws_url, "/ws/synthesize")
+            ws_url = self._tts._ws_url
 
-            # Connect to WebSocket
-            async with websockets.connect(ws_url) as ws:
+            # Connect to WebSocket. Audio chunks for long sentences can exceed
+            # the library's 1 MiB default frame limit, so lift it entirely.
+            # PCM barely compresses, so don't negotiate permessage-deflate.
+            async with ws_connect(ws_url, max_size=None, compression=None) as ws:
                 self._ws = ws
                 logger.info(f"Connected to TTS WebSocket: {ws_url}")
 
                 # Send configuration
-                config = {
-                    "voice_description": self._options.voice_description,
-                    "sample_rate": self._options.sample_rate,
-                }
-                await ws.send(json.dumps(config))
+                await ws.send(self._tts._config_payload)
 
                 # Wait for ready message
                 ready_msg = await ws.recv()
@@ -193,137 +199,62 @@ class ChunkedStream(tts_agents.ChunkedStream):
 
                 logger.info("TTS WebSocket ready")
 
-                # Start send, receive, and keepalive tasks
-                self._send_task = asyncio.create_task(self._send_loop())
-                self._recv_task = asyncio.create_task(self._recv_loop())
-                self._keepalive_task = asyncio.create_task(self._keepalive_loop())
-
-                # Queue the input text for synthesis
-                await self._text_queue.put(self._text)
-                await self._text_queue.put(None)  # Signal end
-
-                # Wait for tasks to complete
-                await asyncio.gather(self._send_task, self._recv_task, self._keepalive_task)
+                # Send the input text followed by the end-of-stream signal
+                await ws.send(json.dumps({"text": self._text}))
+                await ws.send(_END_OF_STREAM_MSG)
+                logger.info("Sent end_of_stream message to server")
+
+                # Receive synthesized audio until the server completes
+                async for message in ws:
+                    if isinstance(message, bytes):
+                        # Binary frames carry raw little-endian int16 PCM,
+                        # exactly the layout AudioFrame expects
+                        assert len(message) % 2 == 0, "odd-length int16 PCM payload"
+
+                        # Create audio frame
+                        frame = rtc.AudioFrame(
+                            data=message,
+                            sample_rate=self._options.sample_rate,
+                            num_channels=1,
+                            samples_per_channel=len(message) // 2,
+                        )
+
+                        # Create synthesized audio
+                        synthesized = tts_agents.SynthesizedAudio(
+                            request_id="",  # Not used in streaming
+                            segment_id=self._segment_id,
+                            frame=frame,
+                        )
+
+                        await self._audio_queue.put(synthesized)
+                        continue
+
+                    # Text frames carry JSON control messages
+                    try:
+                        data = json.loads(message)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Received non-JSON message: {message[:100]}")
+                        continue
 
-        except Exception as e:
-            logger.error(f"WebSocket error: {e}")
-            await self._audio_queue.put(None)
+                    event_type = data.get("type")
 
-        finally:
-            self._closed = True
-            if self._ws:
-                await self._ws.close()
+                    if event_type == "complete":
+                        # Synthesis complete
+                        logger.info("Synthesis completed")
+                        break
 
-    async def _send_loop(self):
-        """Send text to the WebSocket for synthesis."""
-        try:
-            while not self._closed:
-                text = await self._text_queue.get()
-
-                if text is None:
-                    # Send end-of-stream message
-                    if self._ws and not self._ws.closed:
-                        try:
-                            await self._ws.send(json.dumps({"type": "end_of_stream"}))
-                            logger.info("Sent end_of_stream message to server")
-                        except Exception as e:
-                            logger.warning(f"Failed to send end_of_stream: {e}")
-                    break
-
-                if self._ws and not self._ws.closed:
-                    # Send text for synthesis
-                    await self._ws.send(json.dumps({"text": text}))
-
-        except asyncio.CancelledError:
-            logger.debug("Send loop cancelled")
-            raise
-        except Exception as e:
-            logger.error(f"Send loop error: {e}")
+                    elif event_type == "error":
+                        logger.error(f"TTS error: {data.get('message')}")
+                        break
 
-    async def _recv_loop(self):
-        """Receive synthesized audio from the WebSocket."""
-        try:
-            while not self._closed and self._ws:
-                message = await self._ws.recv()
-
-                # Parse JSON response
-                try:
-                    data = json.loads(message)
-                except json.JSONDecodeError:
-                    logger.warning(f"Received non-JSON message: {message[:100]}")
-                    continue
-
-                event_type = data.get("type")
-
-                if event_type == "audio":
-                    # Decode base64 audio data
-                    audio_b64 = data.get("data", "")
-                    audio_bytes = base64.b64decode(audio_b64)
-
-                    # Convert to numpy array (int16 PCM)
-                    audio_np = np.frombuffer(audio_bytes, dtype=np.int16)
-
-                    # Create audio frame
-                    frame = rtc.AudioFrame(
-                        data=audio_np.tobytes(),
-                        sample_rate=self._options.sample_rate,
-                        num_channels=1,
-                        samples_per_channel=len(audio_np),
-                    )
-
-                    # Create synthesized audio
-                    synthesized = tts_agents.SynthesizedAudio(
-                        request_id="",  # Not used in streaming
-                        segment_id=str(self._segment_id),
-                        frame=frame,
-                    )
-                    self._segment_id += 1
-
-                    await self._audio_queue.put(synthesized)
-
-                elif event_type == "complete":
-                    # Synthesis complete
-                    logger.info("Synthesis completed")
-                    break
-
-                elif event_type == "error":
-                    logger.error(f"TTS error: {data.get('message')}")
-                    break
-
-        except asyncio.CancelledError:
-            logger.debug("Receive loop cancelled")
-            raise
         except websockets.ConnectionClosed:
             logger.info("WebSocket connection closed by server")
         except Exception as e:
-            logger.error(f"Receive loop error: {e}")
-
-        finally:
-            # Signal completion
-            await self._audio_queue.put(None)
-
-    async def _keepalive_loop(self):
-        """
-        Send periodic keepalive messages.
-        Prevents connection timeout on long-running streams.
-        """
-        try:
-            while not self._closed and self._ws:
-                await asyncio.sleep(5.0)  # 5 second interval
-
-                if self._ws and not self._ws.closed and not self._input_ended:
-                    try:
-                        await self._ws.send(json.dumps({"type": "keepalive"}))
-                        logger.debug("Sent keepalive")
-                    except Exception as e:
-                        logger.warning(f"Keepalive failed: {e}")
-                        break
+            logger.error(f"WebSocket error: {e}")
 
-        except asyncio.CancelledError:
-            logger.debug("Keepalive loop cancelled")
-            raise
-        except Exception as e:
-            logger.error(f"Keepalive loop error: {e}")
+        # Signal completion. This can block on a full queue, so aclose()
+        # always cancels the task rather than trusting it to have finished
+        await self._audio_queue.put(None)
 
     async def aclose(self):
         """Close the stream and clean up resources."""
@@ -333,39 +264,22 @@ class ChunkedStream(tts_agents.ChunkedStream):
         self._closed = True
         logger.debug("aclose() called")
 
-        # Send end sentinel if not already sent
-        if not self._input_ended:
-            self._input_ended = True
-            try:
-                await asyncio.wait_for(
-                    self._text_queue.put(None),
-                    timeout=1.0
-                )
-            except asyncio.TimeoutError:
-                logger.warning("Timeout queuing end sentinel")
-
-        # Cancel all tasks gracefully
-        tasks_to_cancel = []
-        if self._main_task and not self._main_task.done():
-            tasks_to_cancel.append(self._main_task)
-        if self._send_task and not self._send_task.done():
-            tasks_to_cancel.append(self._send_task)
-        if self._recv_task and not self._recv_task.done():
-            tasks_to_cancel.append(self._recv_task)
-        if self._keepalive_task and not self._keepalive_task.done():
-            tasks_to_cancel.append(self._keepalive_task)
-
-        for task in tasks_to_cancel:
-            task.cancel()
-
-        # Wait for cancellation to complete
-        if tasks_to_cancel:
-            await asyncio.gather(*tasks_to_cancel, return_exceptions=True)
-
         # Close WebSocket with proper close code
-        if self._ws and not self._ws.closed:
+        if self._ws:
             try:
                 await self._ws.close(code=1000)
                 logger.debug("WebSocket closed normally")
             except Exception as e:
                 logger.warning(f"Error closing WebSocket: {e}")
+
+        # Cancel the main task and wait for it to finish. It may be past the
+        # WebSocket and still blocked delivering the end-of-stream sentinel
+        if self._main_task and not self._main_task.done():
+            self._main_task.cancel()
+            await asyncio.gather(self._main_task, return_exceptions=True)
+
+        # Wake a consumer still waiting in __anext__()
+        try:
+            self._audio_queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
@@ -0,0 +1,95 @@
+"""
+Unit tests for the TTS API's audio and text helpers, without a model:
+- f32_to_i16 (Numba kernel and NumPy fallback)
+- wav_header
+- split_into_sentences
+"""
+
+import importlib
+import importlib.util
+import io
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+TTS_API_DIR = os.path.join(os.path.dirname(__file__), '..', 'tts-api')
+sys.path.insert(0, TTS_API_DIR)
+import audio_codec
+
+
+SAMPLES = np.array([-1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5], dtype=np.float32)
+EXPECTED_PCM = np.array([-32767, -32767, -16383, 0, 16383, 32767, 32767], dtype=np.int16)
+
+
+@pytest.fixture
+def numpy_codec(monkeypatch):
+    """audio_codec reloaded as if Numba were not installed."""
+    monkeypatch.setitem(sys.modules, "numba", None)
+    yield importlib.reload(audio_codec)
+    monkeypatch.undo()
+    importlib.reload(audio_codec)
+
+
+def test_f32_to_i16():
+    """Samples are scaled to int16 and clipped (Numba kernel when installed)."""
+    out = np.empty(len(SAMPLES), dtype=np.int16)
+
+    audio_codec.f32_to_i16(SAMPLES, out)
+
+    np.testing.assert_array_equal(out, EXPECTED_PCM)
+
+
+def test_f32_to_i16_numpy_fallback(numpy_codec):
+    """The NumPy fallback matches the kernel and leaves its input untouched."""
+    assert numpy_codec.njit is None
+    samples = SAMPLES.copy()
+    out = np.empty(len(samples), dtype=np.int16)
+
+    numpy_codec.f32_to_i16(samples, out)
+
+    np.testing.assert_array_equal(out, EXPECTED_PCM)
+    np.testing.assert_array_equal(samples, SAMPLES)
+
+
+@pytest.fixture(scope="module")
+def tts_api():
+    """The server module, which needs torch and FastAPI but no model."""
+    pytest.importorskip("torch")
+    # Loaded under its own name: the STT API's tests also load a main.py
+    spec = importlib.util.spec_from_file_location(
+        "tts_api_main", os.path.join(TTS_API_DIR, "main.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_wav_header(tts_api):
+    """The header describes mono 16-bit PCM and is readable as a WAV file."""
+    pcm = EXPECTED_PCM.tobytes()
+
+    data = tts_api.wav_header(len(pcm), tts_api.SAMPLE_RATE) + pcm
+
+    assert len(data) == 44 + len(pcm)
+    with wave.open(io.BytesIO(data)) as wav_file:
+        assert wav_file.getnchannels() == 1
+        assert wav_file.getsampwidth() == 2
+        assert wav_file.getframerate() == tts_api.SAMPLE_RATE
+        assert wav_file.readframes(wav_file.getnframes()) == pcm
+
+
+def test_split_into_sentences(tts_api):
+    """Sentences keep their terminators; trailing text stays its own item."""
+    sentences = tts_api.split_into_sentences("Hello there. How are you? Fine")
+
+    assert sentences == ["Hello there. ", "How are you? ", "Fine"]
+
+
+def test_split_into_sentences_without_terminator(tts_api):
+    """Text without a sentence terminator is returned whole."""
+    assert tts_api.split_into_sentences("Hello there") == ["Hello there"]
+    assert tts_api.split_into_sentences("Hello there.") == ["Hello there."]
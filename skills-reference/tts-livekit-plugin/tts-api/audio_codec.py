@@ -0,0 +1,35 @@
+"""
+Audio sample conversion kernels for the TTS API.
+
+The float32 -> int16 PCM conversion runs once per synthesized chunk, on the
+event loop. With Numba installed it is JIT-compiled into a SIMD-vectorized
+loop; without it, an equivalent NumPy implementation is used. A chunk is far
+too short for a parallel loop to pay for its thread launches.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+
+    @njit(fastmath=True, cache=True)
+    def f32_to_i16(x, out):
+        """Scale float samples in [-1, 1] to int16, clipping, into out."""
+        for i in range(x.shape[0]):
+            v = x[i] * 32767.0
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32767.0:
+                v = -32767.0
+            out[i] = np.int16(v)
+
+else:
+
+    def f32_to_i16(x, out):
+        """Scale float samples in [-1, 1] to int16, clipping, into out."""
+        np.multiply(np.clip(x, -1.0, 1.0), 32767, out=out, casting="unsafe")
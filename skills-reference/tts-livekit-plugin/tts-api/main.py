@@ -5,12 +5,21 @@ Supports Parler-TTS, F5-TTS, and XTTS-v2 models.
 """
 
 import asyncio
+import contextlib
+import functools
 import json
 import logging
 import os
-from typing import Optional, Literal
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional, Literal
 from io import BytesIO
-import base64
+
+# Intra-op thread pools oversubscribe the CPU when several requests run
+# inference concurrently; must be set before torch is imported
+os.environ.setdefault("OMP_NUM_THREADS", "1")
 
 import numpy as np
 import torch
@@ -19,6 +28,32 @@ from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
+from audio_codec import f32_to_i16
+
+try:
+    import av  # PyAV, only needed for MP3 output
+except ImportError:
+    av = None
+
+# orjson is several times faster on the per-message WebSocket path; fall back
+# to the standard library when it is not installed
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+# Autotuning picks different kernels as input shapes vary, which costs more
+# than it saves for variable-length generation
+torch.backends.cudnn.benchmark = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,12 +69,53 @@ app = FastAPI(
 model = None
 tokenizer = None
 feature_extractor = None
+streamer_class = None  # ParlerTTSStreamer, imported when STREAMING_DECODE is on
+
+# Parler-TTS forward passes: eager, and compiled into CUDA graphs when enabled
+eager_forward = None
+graph_forward = None
+
+# Parler-TTS generation runs on one dedicated thread. Captured CUDA graphs
+# share static buffers, and torch's CUDA graph trees are tracked per thread,
+# so capture and every replay must happen on the same thread.
+generate_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="parler")
+
+# Micro-batcher for WebSocket synthesis (Parler-TTS only)
+batcher: Optional["ParlerBatcher"] = None
+
+# Per-thread pinned staging buffers and copy streams
+_scratch = threading.local()
+
+# Reused int16 buffer for PCM conversion, which only runs on the event loop
+_pcm16_buffer: Optional[np.ndarray] = None
 
 # Configuration
 MODEL_TYPE = os.getenv("TTS_MODEL_TYPE", "parler")  # parler, f5, xtts
 MODEL_NAME = os.getenv("TTS_MODEL_NAME", "parler-tts/parler-tts-mini-v1")
 DEVICE = os.getenv("TTS_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
 SAMPLE_RATE = 24000  # Standard for most TTS models
+PCM16_SCRATCH_SAMPLES = SAMPLE_RATE * 30  # Initial PCM scratch size (30 seconds)
+
+# CUDA graph capture for Parler-TTS (CUDA only). Token ids are padded up to the
+# nearest bucket so that only these shapes are ever captured; longer inputs
+# and batches run eagerly. A single description bucket keeps the static KV
+# cache (whose cross-attention part is sized by the description) one shape.
+CUDA_GRAPHS = os.getenv("TTS_CUDA_GRAPHS", "1") == "1"
+DESCRIPTION_BUCKETS = (64,)
+PROMPT_BUCKETS = (32, 64, 128)
+
+# Sentence terminators (with trailing whitespace) for streaming synthesis
+_SENTENCE_SPLIT_RE = re.compile(r'([.!?]+\s+)')
+
+# Micro-batching of concurrent WebSocket sentences (Parler-TTS only)
+MAX_BATCH_SIZE = int(os.getenv("TTS_MAX_BATCH_SIZE", "8"))
+MAX_BATCH_WAIT_MS = float(os.getenv("TTS_MAX_BATCH_WAIT_MS", "10"))
+
+# Stream Parler-TTS audio to WebSocket clients while it is being decoded,
+# in chunks of STREAM_CHUNK_SECONDS. Lowers time to first audio, but each
+# sentence is generated on its own instead of being micro-batched.
+STREAMING_DECODE = os.getenv("TTS_STREAMING_DECODE", "0") == "1"
+STREAM_CHUNK_SECONDS = float(os.getenv("TTS_STREAM_CHUNK_SECONDS", "0.2"))
 
 
 class TTSRequest(BaseModel):
@@ -51,7 +127,7 @@ class TTSRequest(BaseModel):
 
 def load_model():
     """Load the TTS model on startup."""
-    global model, tokenizer, feature_extractor
+    global model, tokenizer, feature_extractor, streamer_class
 
     logger.info(f"Loading TTS model: {MODEL_NAME} ({MODEL_TYPE}) on {DEVICE}")
 
@@ -59,9 +135,21 @@ def load_model():
         from parler_tts import ParlerTTSForConditionalGeneration
         from transformers import AutoTokenizer
 
+        if STREAMING_DECODE:
+            from parler_tts import ParlerTTSStreamer
+
+            streamer_class = ParlerTTSStreamer
+
         model = ParlerTTSForConditionalGeneration.from_pretrained(MODEL_NAME).to(DEVICE)
+        if DEVICE.startswith("cuda"):
+            # bf16 runs on tensor cores with fp32 dynamic range
+            model = model.to(torch.bfloat16)
         tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
 
+        if CUDA_GRAPHS and DEVICE.startswith("cuda") and torch.cuda.is_available():
+            # Captured on the generation thread that will replay the graphs
+            generate_executor.submit(capture_parler_graphs).result()
+
     elif MODEL_TYPE == "f5":
         from f5_tts import F5TTS
         model = F5TTS(MODEL_NAME, device=DEVICE)
@@ -73,14 +161,24 @@ def load_model():
     else:
         raise ValueError(f"Unknown model type: {MODEL_TYPE}")
 
+    # Compile the PCM conversion kernel now (when Numba is installed) instead
+    # of on the first request
+    f32_to_i16(np.zeros(16, dtype=np.float32), np.empty(16, dtype=np.int16))
+
     logger.info("Model loaded successfully")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize model on startup."""
+    global batcher
+
     load_model()
 
+    if MODEL_TYPE == "parler":
+        batcher = ParlerBatcher(MAX_BATCH_SIZE, MAX_BATCH_WAIT_MS)
+        batcher.start()
+
 
 @app.get("/")
 async def root():
@@ -114,35 +212,28 @@ async def synthesize_speech(request: TTSRequest):
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
+    if request.format == "mp3" and av is None:
+        raise HTTPException(status_code=501, detail="MP3 output requires PyAV (pip install av)")
+
     try:
         logger.info(f"Synthesizing: '{request.text[:50]}...'")
 
-        # Generate speech based on model type
+        # Generate speech based on model type, off the event loop
+        loop = asyncio.get_running_loop()
         if MODEL_TYPE == "parler":
-            # Tokenize text and voice description
-            input_ids = tokenizer(request.voice_description, return_tensors="pt").input_ids.to(DEVICE)
-            prompt_input_ids = tokenizer(request.text, return_tensors="pt").input_ids.to(DEVICE)
-
-            # Generate audio
-            generation = model.generate(
-                input_ids=input_ids,
-                prompt_input_ids=prompt_input_ids,
-                do_sample=True,
-                temperature=1.0
-            )
-            audio_arr = generation.cpu().numpy().squeeze()
+            audio_arr = (await synthesize_parler_batch([request.text], [request.voice_description]))[0]
 
         elif MODEL_TYPE == "f5":
-            audio_arr = model.sample(
-                text=request.text,
-                target_sample_rate=SAMPLE_RATE
+            audio_arr = await loop.run_in_executor(
+                None,
+                lambda: model.sample(text=request.text, target_sample_rate=SAMPLE_RATE)
             )
 
         elif MODEL_TYPE == "xtts":
-            audio_arr = model.tts(text=request.text)
+            audio_arr = await loop.run_in_executor(None, lambda: model.tts(text=request.text))
 
         # Convert to bytes
-        audio_bytes = (audio_arr * 32767).astype(np.int16).tobytes()
+        audio_bytes = to_pcm16_bytes(audio_arr)
 
         # Return based on format
         if request.format == "raw":
@@ -153,40 +244,17 @@ async def synthesize_speech(request: TTSRequest):
             )
 
         elif request.format == "wav":
-            import io
-            import wave
-
-            wav_io = io.BytesIO()
-            with wave.open(wav_io, 'wb') as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(SAMPLE_RATE)
-                wav_file.writeframes(audio_bytes)
-
-            wav_io.seek(0)
             return Response(
-                content=wav_io.read(),
+                content=wav_header(len(audio_bytes), SAMPLE_RATE) + audio_bytes,
                 media_type="audio/wav"
             )
 
         elif request.format == "mp3":
-            # Convert to MP3 using pydub
-            from pydub import AudioSegment
-            import io
-
-            audio_segment = AudioSegment(
-                data=audio_bytes,
-                sample_width=2,
-                frame_rate=SAMPLE_RATE,
-                channels=1
-            )
-
-            mp3_io = io.BytesIO()
-            audio_segment.export(mp3_io, format="mp3", bitrate="192k")
-            mp3_io.seek(0)
+            # Encode in-process with PyAV (no ffmpeg subprocess per request)
+            pcm = np.frombuffer(audio_bytes, dtype=np.int16)
 
             return Response(
-                content=mp3_io.read(),
+                content=encode_mp3(pcm, SAMPLE_RATE),
                 media_type="audio/mpeg"
             )
 
@@ -205,22 +273,25 @@ async def websocket_synthesize(websocket: WebSocket):
       {"voice_description": "clear voice", "sample_rate": 24000}
     - Client sends text chunks:
       {"text": "Hello world"}
-    - Server responds with audio chunks:
-      {"type": "audio", "data": "<base64>", "sample_rate": 24000}
+    - Server responds with audio chunks as binary frames of raw int16 PCM
+      at the sample rate announced in the ready message, then:
       {"type": "complete"}
+    - Text frames are reserved for JSON control messages.
     """
     await websocket.accept()
     logger.info("WebSocket client connected")
 
     if model is None:
-        await websocket.send_json({"type": "error", "message": "Model not loaded"})
+        await websocket.send_text(json_dumps({"type": "error", "message": "Model not loaded"}))
         await websocket.close()
         return
 
+    sender: Optional[asyncio.Task] = None
+
     try:
         # Receive configuration
         config_msg = await websocket.receive_text()
-        config = json.loads(config_msg)
+        config = json_loads(config_msg)
 
         voice_description = config.get("voice_description", "A neutral, clear voice.")
         requested_sample_rate = config.get("sample_rate", SAMPLE_RATE)
@@ -228,15 +299,20 @@ async def websocket_synthesize(websocket: WebSocket):
         logger.info(f"WebSocket config: voice='{voice_description}', sr={requested_sample_rate}")
 
         # Send acknowledgment
-        await websocket.send_json({
+        await websocket.send_text(json_dumps({
             "type": "ready",
             "message": "Ready to synthesize",
             "sample_rate": SAMPLE_RATE
-        })
+        }))
 
         # Text buffer for sentence-level synthesis
         text_buffer = ""
 
+        # Synthesized chunks are handed to a sender task so the next sentence
+        # is generated while the previous one is still going out on the wire
+        audio_queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=4)
+        sender = asyncio.create_task(_send_audio(websocket, audio_queue))
+
         while True:
             try:
                 message = await websocket.receive()
@@ -244,7 +320,7 @@ async def websocket_synthesize(websocket: WebSocket):
                 # Handle text messages (synthesis requests and control)
                 if "text" in message:
                     try:
-                        msg_data = json.loads(message["text"])
+                        msg_data = json_loads(message["text"])
                         msg_type = msg_data.get("type")
 
                         if msg_type == "keepalive":
@@ -256,25 +332,21 @@ async def websocket_synthesize(websocket: WebSocket):
 
                             # Synthesize any remaining text
                             if text_buffer.strip():
-                                audio_chunk = await synthesize_chunk(
+                                await _queue_speech(
                                     text_buffer.strip(),
-                                    voice_description
+                                    voice_description,
+                                    audio_queue
                                 )
 
-                                if audio_chunk is not None:
-                                    # Send audio data as base64
-                                    audio_b64 = base64.b64encode(audio_chunk).decode('utf-8')
-                                    await websocket.send_json({
-                                        "type": "audio",
-                                        "data": audio_b64,
-                                        "sample_rate": SAMPLE_RATE
-                                    })
+                            # Wait for all queued audio to go out before completing
+                            await audio_queue.put(None)
+                            await sender
 
                             # Send completion message
-                            await websocket.send_json({
+                            await websocket.send_text(json_dumps({
                                 "type": "complete",
                                 "message": "Synthesis completed"
-                            })
+                            }))
 
                             logger.info("Session ended gracefully")
                             break
@@ -290,20 +362,12 @@ async def websocket_synthesize(websocket: WebSocket):
                             # Synthesize complete sentences
                             for sentence in sentences[:-1]:  # All but last (may be incomplete)
                                 if sentence.strip():
-                                    audio_chunk = await synthesize_chunk(
+                                    await _queue_speech(
                                         sentence.strip(),
-                                        voice_description
+                                        voice_description,
+                                        audio_queue
                                     )
 
-                                    if audio_chunk is not None:
-                                        # Send audio data as base64
-                                        audio_b64 = base64.b64encode(audio_chunk).decode('utf-8')
-                                        await websocket.send_json({
-                                            "type": "audio",
-                                            "data": audio_b64,
-                                            "sample_rate": SAMPLE_RATE
-                                        })
-
                             # Keep incomplete sentence in buffer
                             text_buffer = sentences[-1] if sentences else ""
 
@@ -323,10 +387,10 @@ async def websocket_synthesize(websocket: WebSocket):
             except Exception as e:
                 logger.error(f"WebSocket processing error: {e}")
                 try:
-                    await websocket.send_json({
+                    await websocket.send_text(json_dumps({
                         "type": "error",
                         "message": str(e)
-                    })
+                    }))
                 except:
                     pass
 
@@ -334,6 +398,9 @@ async def websocket_synthesize(websocket: WebSocket):
         logger.error(f"WebSocket error: {e}")
 
     finally:
+        if sender is not None and not sender.done():
+            sender.cancel()
+
         try:
             await websocket.close(code=1000)
             logger.info("WebSocket closed")
@@ -341,6 +408,40 @@ async def websocket_synthesize(websocket: WebSocket):
             logger.debug(f"Error closing websocket: {e}")
 
 
+async def _send_audio(websocket: WebSocket, audio_queue: asyncio.Queue):
+    """
+    Send queued audio chunks as binary frames until the None sentinel.
+
+    Send failures are logged and the queue keeps draining, so producers
+    never block on a full queue after the client has gone away.
+    """
+    while True:
+        audio_chunk = await audio_queue.get()
+        if audio_chunk is None:
+            return
+
+        try:
+            # Send raw PCM as a binary frame
+            await websocket.send_bytes(audio_chunk)
+        except Exception as e:
+            logger.warning(f"Failed to send audio chunk: {e}")
+
+
+async def _queue_speech(text: str, voice_description: str, audio_queue: asyncio.Queue):
+    """Synthesize text and queue its audio for the sender task."""
+    if STREAMING_DECODE and MODEL_TYPE == "parler":
+        try:
+            async for audio_chunk in synthesize_chunk_stream(text, voice_description):
+                await audio_queue.put(audio_chunk)
+        except Exception as e:
+            logger.error(f"Streaming synthesis error: {e}")
+        return
+
+    audio_chunk = await synthesize_chunk(text, voice_description)
+    if audio_chunk is not None:
+        await audio_queue.put(audio_chunk)
+
+
 async def synthesize_chunk(text: str, voice_description: str) -> Optional[bytes]:
     """
     Synthesize a chunk of text asynchronously.
@@ -354,12 +455,8 @@ async def synthesize_chunk(text: str, voice_description: str) -> Optional[bytes]
     """
     try:
         if MODEL_TYPE == "parler":
-            # Run in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            audio_arr = await loop.run_in_executor(
-                None,
-                lambda: _synthesize_parler(text, voice_description)
-            )
+            # Batched with concurrent sessions, generated in the executor
+            audio_arr = await batcher.submit(text, voice_description)
 
         elif MODEL_TYPE == "f5":
             audio_arr = await asyncio.get_event_loop().run_in_executor(
@@ -374,27 +471,415 @@ async def synthesize_chunk(text: str, voice_description: str) -> Optional[bytes]
             )
 
         # Convert to int16 bytes
-        audio_bytes = (audio_arr * 32767).astype(np.int16).tobytes()
-        return audio_bytes
+        return to_pcm16_bytes(audio_arr)
 
     except Exception as e:
         logger.error(f"Chunk synthesis error: {e}")
         return None
 
 
-def _synthesize_parler(text: str, voice_description: str) -> np.ndarray:
-    """Synchronous Parler-TTS synthesis."""
-    input_ids = tokenizer(voice_description, return_tensors="pt").input_ids.to(DEVICE)
-    prompt_input_ids = tokenizer(text, return_tensors="pt").input_ids.to(DEVICE)
+async def synthesize_chunk_stream(text: str, voice_description: str) -> AsyncIterator[bytes]:
+    """
+    Synthesize a chunk of text with Parler-TTS, yielding audio as it is decoded.
+
+    Generation runs in the executor while a ParlerTTSStreamer hands back
+    audio every STREAM_CHUNK_SECONDS, so the first audio is available after
+    a few decoding steps instead of after the whole sentence.
+
+    Args:
+        text: Text to synthesize
+        voice_description: Voice characteristics
+
+    Yields:
+        Audio data as bytes (int16 PCM)
+    """
+    loop = asyncio.get_running_loop()
+    play_steps = max(1, int(STREAM_CHUNK_SECONDS * model.audio_encoder.config.frame_rate))
+    streamer = streamer_class(model, device=DEVICE, play_steps=play_steps)
 
-    generation = model.generate(
-        input_ids=input_ids,
-        prompt_input_ids=prompt_input_ids,
-        do_sample=True,
-        temperature=1.0
+    generation = loop.run_in_executor(
+        generate_executor, _generate_parler_streaming, text, voice_description, streamer
     )
 
-    return generation.cpu().numpy().squeeze()
+    while True:
+        audio = await loop.run_in_executor(None, next, streamer, None)
+        if audio is None:
+            break
+        if audio.shape[0] > 0:
+            yield to_pcm16_bytes(audio)
+
+    # Surface any generation error
+    await generation
+
+
+def _generate_parler_streaming(text: str, voice_description: str, streamer):
+    """Synchronous Parler-TTS generation feeding a streamer; run on generate_executor."""
+    description, _ = _tokenize_descriptions((voice_description,))
+    prompt, _ = _tokenize_parler([text], PROMPT_BUCKETS)
+
+    try:
+        if graph_forward is not None:
+            model.forward = eager_forward
+
+        with _parler_inference_context():
+            model.generate(
+                input_ids=description.input_ids,
+                attention_mask=description.attention_mask,
+                prompt_input_ids=prompt.input_ids,
+                prompt_attention_mask=prompt.attention_mask,
+                do_sample=True,
+                temperature=1.0,
+                streamer=streamer,
+            )
+    except Exception:
+        # Unblock the consumer, which would otherwise wait for audio forever
+        streamer.on_finalized_audio(np.zeros(0, dtype=np.float32), stream_end=True)
+        raise
+
+
+@contextlib.contextmanager
+def _parler_inference_context():
+    """Run Parler-TTS generation without autograd, under bf16 autocast on CUDA."""
+    with torch.inference_mode(), torch.autocast(
+        "cuda", dtype=torch.bfloat16, enabled=DEVICE.startswith("cuda")
+    ):
+        yield
+
+
+def capture_parler_graphs():
+    """
+    Capture the Parler-TTS forward pass into CUDA graphs.
+
+    torch.compile's "reduce-overhead" mode records a CUDA graph per input
+    shape and replays it on later calls, removing Python dispatch and kernel
+    launch overhead from every decoding step. A static KV cache keeps shapes
+    fixed across steps, and warming up every bucket pair captures all graphs
+    at startup instead of on the first requests. Only graphed calls use the
+    static cache, so eager calls with other shapes never reallocate it.
+
+    Must run on generate_executor, the thread that replays the graphs.
+    """
+    global eager_forward, graph_forward
+
+    logger.info("Capturing Parler-TTS CUDA graphs")
+
+    eager_forward = model.forward
+    graph_forward = torch.compile(model.forward, mode="reduce-overhead")
+    model.forward = graph_forward
+
+    for description_len in DESCRIPTION_BUCKETS:
+        for prompt_len in PROMPT_BUCKETS:
+            description = tokenizer(
+                "warm up", return_tensors="pt", padding="max_length", max_length=description_len
+            ).to(DEVICE)
+            prompt = tokenizer(
+                "warm up", return_tensors="pt", padding="max_length", max_length=prompt_len
+            ).to(DEVICE)
+
+            # The first call compiles, the second records the graph
+            for _ in range(2):
+                with _parler_inference_context():
+                    model.generate(
+                        input_ids=description.input_ids,
+                        attention_mask=description.attention_mask,
+                        prompt_input_ids=prompt.input_ids,
+                        prompt_attention_mask=prompt.attention_mask,
+                        cache_implementation="static",
+                    )
+
+    logger.info("Parler-TTS CUDA graphs captured")
+
+
+def _tokenize_parler(texts: list[str], buckets: tuple[int, ...]):
+    """
+    Tokenize a batch of texts for Parler-TTS, padded to the longest item.
+
+    When CUDA graphs are captured and a single text fits, ids are padded to
+    the nearest bucket length instead so a captured graph can be replayed.
+
+    Returns:
+        Tuple of (encoding on DEVICE, whether it was padded to a bucket)
+    """
+    encoding = tokenizer(texts)
+
+    bucket = None
+    if graph_forward is not None and len(texts) == 1:
+        length = len(encoding["input_ids"][0])
+        bucket = next((b for b in buckets if b >= length), None)
+
+    if bucket is None:
+        return tokenizer.pad(encoding, return_tensors="pt").to(DEVICE), False
+
+    padded = tokenizer.pad(encoding, padding="max_length", max_length=bucket, return_tensors="pt")
+    return padded.to(DEVICE), True
+
+
+@functools.lru_cache(maxsize=64)
+def _tokenize_descriptions(voice_descriptions: tuple[str, ...]):
+    """
+    Tokenize voice descriptions for Parler-TTS, memoized.
+
+    A session keeps one voice description for all of its sentences, so the
+    tokenized ids (already on DEVICE) are reused instead of re-tokenizing
+    and re-uploading them per sentence. Callers must not modify the result.
+    """
+    return _tokenize_parler(list(voice_descriptions), DESCRIPTION_BUCKETS)
+
+
+def _generate_parler_batch(texts: list[str], voice_descriptions: list[str]):
+    """
+    Synchronous Parler-TTS generation of a batch of sentences; run on generate_executor.
+
+    Returns:
+        Tuple of (int16 audio on DEVICE padded to the longest item, per-item
+        lengths, CUDA event recorded once the audio is ready or None off CUDA)
+    """
+    description, description_bucketed = _tokenize_descriptions(tuple(voice_descriptions))
+    prompt, prompt_bucketed = _tokenize_parler(texts, PROMPT_BUCKETS)
+
+    # Replay captured graphs for bucketed shapes, run anything else eagerly
+    # (with a dynamic cache) rather than compiling a new graph mid-request
+    graphed = graph_forward is not None and description_bucketed and prompt_bucketed
+    if graph_forward is not None:
+        model.forward = graph_forward if graphed else eager_forward
+
+    with _parler_inference_context():
+        generation = model.generate(
+            input_ids=description.input_ids,
+            attention_mask=description.attention_mask,
+            prompt_input_ids=prompt.input_ids,
+            prompt_attention_mask=prompt.attention_mask,
+            do_sample=True,
+            temperature=1.0,
+            return_dict_in_generate=True,
+            cache_implementation="static" if graphed else None,
+        )
+
+        # Quantize to int16 on the device before the copy, halving the transfer;
+        # scale in fp32 so the product is not rounded back to bf16 precision
+        audios = (generation.sequences.float().clamp(-1, 1) * 32767).to(torch.int16)
+
+    # Mark the end of the quantization on this thread's stream. The host copy
+    # runs on another thread, by which time this stream may have moved on to
+    # the next generation, so it waits on this event instead of the stream
+    ready = None
+    if audios.is_cuda:
+        ready = torch.cuda.Event()
+        ready.record(torch.cuda.current_stream(audios.device))
+
+    return audios, generation.audios_length, ready
+
+
+def _parler_audio_to_host(audios: torch.Tensor, lengths, ready: Optional[torch.cuda.Event]) -> list[np.ndarray]:
+    """
+    Copy generated int16 audio to host memory, trimmed per item.
+
+    Runs outside generate_executor so the copy overlaps with the next
+    generation.
+    """
+    host = _to_host(audios, ready)
+
+    # Outputs are padded to the longest item; trim each to its own length,
+    # copying out of the reused staging buffer
+    return [host[i, :int(length)].copy() for i, length in enumerate(lengths)]
+
+
+async def synthesize_parler_batch(texts: list[str], voice_descriptions: list[str]) -> list[np.ndarray]:
+    """Synthesize a batch of sentences with Parler-TTS off the event loop."""
+    loop = asyncio.get_running_loop()
+    audios, lengths, ready = await loop.run_in_executor(
+        generate_executor, _generate_parler_batch, texts, voice_descriptions
+    )
+    return await loop.run_in_executor(None, _parler_audio_to_host, audios, lengths, ready)
+
+
+class ParlerBatcher:
+    """
+    Server-wide micro-batcher for Parler-TTS synthesis.
+
+    Sentences submitted by concurrent WebSocket sessions within a short
+    window are synthesized together in one padded model.generate call, and
+    each caller's future receives its own audio.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue[tuple[str, str, asyncio.Future]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background batching task."""
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, text: str, voice_description: str) -> np.ndarray:
+        """
+        Queue a sentence for synthesis.
+
+        Args:
+            text: Text to synthesize
+            voice_description: Voice characteristics
+
+        Returns:
+            int16 audio array for this sentence
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, voice_description, future))
+        return await future
+
+    async def _run(self):
+        """Drain the queue in batches and synthesize them off the event loop."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # Block for the first item, then collect more until the window closes
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _, _ in batch]
+            voice_descriptions = [voice for _, voice, _ in batch]
+
+            try:
+                audios = await synthesize_parler_batch(texts, voice_descriptions)
+            except Exception as e:
+                logger.error(f"Batch synthesis error: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, _, future), audio in zip(batch, audios):
+                if not future.done():
+                    future.set_result(audio)
+
+
+def _pcm16_scratch(num_samples: int) -> np.ndarray:
+    """Return an int16 scratch buffer of num_samples, reused across calls."""
+    global _pcm16_buffer
+    if _pcm16_buffer is None or _pcm16_buffer.shape[0] < num_samples:
+        _pcm16_buffer = np.empty(max(num_samples, PCM16_SCRATCH_SAMPLES), dtype=np.int16)
+    return _pcm16_buffer[:num_samples]
+
+
+def _pinned_staging(num_samples: int) -> torch.Tensor:
+    """Return a pinned int16 host buffer of num_samples, reused per thread."""
+    buffer = getattr(_scratch, "pinned", None)
+    if buffer is None or buffer.shape[0] < num_samples:
+        buffer = torch.empty(max(num_samples, PCM16_SCRATCH_SAMPLES), dtype=torch.int16, pin_memory=True)
+        _scratch.pinned = buffer
+    return buffer[:num_samples]
+
+
+def _to_host(audio: torch.Tensor, ready: Optional[torch.cuda.Event]) -> np.ndarray:
+    """
+    Copy int16 audio from the device to host memory.
+
+    On CUDA the copy is an async DMA into a pinned staging buffer on a
+    per-thread copy stream, so it overlaps with generation that another
+    request has already started on the default stream. The copy waits on
+    ready, the event recorded once audio was produced. The returned array
+    is a view of the staging buffer and is only valid until the next call
+    on this thread.
+    """
+    if audio.device.type != "cuda":
+        return audio.numpy()
+
+    copy_stream = getattr(_scratch, "copy_stream", None)
+    if copy_stream is None:
+        copy_stream = torch.cuda.Stream(device=audio.device)
+        _scratch.copy_stream = copy_stream
+
+    host = _pinned_staging(audio.numel()).view(audio.shape)
+
+    # Order the copy after the quantization kernel, then wait only on it
+    copy_stream.wait_event(ready)
+    with torch.cuda.stream(copy_stream):
+        host.copy_(audio, non_blocking=True)
+        audio.record_stream(copy_stream)
+    copy_stream.synchronize()
+
+    return host.numpy()
+
+
+def to_pcm16_bytes(audio) -> bytes:
+    """
+    Convert synthesized audio to int16 PCM bytes.
+
+    Float audio in [-1, 1] is scaled, clipped and cast in a single pass
+    (a Numba kernel when available) straight into a reused int16 buffer.
+    Audio that is already int16 (quantized on the GPU) is returned as is.
+
+    Args:
+        audio: Float samples in [-1, 1] or int16 samples
+
+    Returns:
+        Audio data as bytes (int16 PCM)
+    """
+    audio = np.asarray(audio).ravel()
+    if audio.dtype == np.int16:
+        return audio.tobytes()
+
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    pcm = _pcm16_scratch(audio.shape[0])
+    f32_to_i16(audio, pcm)
+    return pcm.tobytes()
+
+
+def wav_header(data_size: int, sample_rate: int) -> bytes:
+    """
+    Build the 44-byte header of a mono 16-bit PCM WAV file.
+
+    Args:
+        data_size: Size of the PCM data in bytes
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        RIFF/WAVE header to prepend to the PCM data
+    """
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def encode_mp3(pcm: np.ndarray, sample_rate: int, bit_rate: int = 192000) -> bytes:
+    """
+    Encode mono int16 PCM to MP3 in memory using PyAV.
+
+    Args:
+        pcm: Mono int16 samples
+        sample_rate: Sample rate in Hz
+        bit_rate: Target MP3 bit rate in bits per second
+
+    Returns:
+        MP3 file contents
+    """
+    mp3_io = BytesIO()
+
+    with av.open(mp3_io, mode="w", format="mp3") as container:
+        stream = container.add_stream("mp3", rate=sample_rate)
+        stream.codec_context.layout = "mono"
+        stream.codec_context.bit_rate = bit_rate
+
+        frame = av.AudioFrame.from_ndarray(pcm[np.newaxis, :], format="s16", layout="mono")
+        frame.sample_rate = sample_rate
+
+        # The encoder converts to its native sample format; flush with None
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+    return mp3_io.getvalue()
 
 
 def split_into_sentences(text: str) -> list[str]:
@@ -407,10 +892,13 @@ def split_into_sentences(text: str) -> list[str]:
     Returns:
         List of sentences
     """
-    import re
+    # Most calls see an incomplete sentence; skip the regex when there is
+    # no terminator to split on
+    if "." not in text and "!" not in text and "?" not in text:
+        return [text]
 
     # Simple sentence splitting on common terminators
-    sentences = re.split(r'([.!?]+\s+)', text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
 
     # Recombine sentences with their terminators
     result = []
@@ -425,10 +913,16 @@ def split_into_sentences(text: str) -> list[str]:
 
 
 if __name__ == "__main__":
+    # Each worker loads its own model copy; run the CUDA MPS daemon
+    # (nvidia-cuda-mps-control -d) to share one GPU between workers
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8001,  # Use 8001 to avoid conflict with STT on 8000
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        workers=int(os.getenv("TTS_WORKERS", "1")),
         reload=False,
         log_level="info"
     )